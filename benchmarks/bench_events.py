@@ -0,0 +1,35 @@
+"""Event bus overhead benchmark
+
+Delivers the same truck many times with no sink attached and with a
+counter sink attached.
+
+    python -m benchmarks.bench_events
+"""
+from time import perf_counter
+
+from design_patterns.creational.factory import DeliveryRoute, Truck
+from design_patterns.events import CounterSink, bus
+
+CALLS = 1_000_000
+
+
+def deliver(truck: Truck) -> float:
+    start = perf_counter()
+    for _ in range(CALLS):
+        truck.deliver()
+    return perf_counter() - start
+
+
+def main() -> None:
+    truck = Truck(DeliveryRoute('London', 'Paris'))
+    elapsed = deliver(truck)
+    print(f'no sink      {CALLS} deliveries: {elapsed:.3f}s '
+          f'({elapsed / CALLS * 1e9:.0f} ns/call)')
+    with bus.attached(CounterSink()):
+        elapsed = deliver(truck)
+    print(f'counter sink {CALLS} deliveries: {elapsed:.3f}s '
+          f'({elapsed / CALLS * 1e9:.0f} ns/call)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Vehicle memory benchmark
+
+Measures bytes per vehicle for a fleet of blueprints, comparing dict-backed
+records with a new engine per vehicle (the previous layout) against slotted
+records sharing interned engines.
+
+    python -m benchmarks.creational.bench_builder
+"""
+import tracemalloc
+from typing import Callable
+
+from design_patterns.creational.builder import (Engine, Fuel, Transmission,
+                                                VehicleBlueprint)
+
+FLEET = 1_000_000
+SPECS = ((Fuel.gasoline, 8), (Fuel.diesel, 6), (Fuel.electric, 0), (Fuel.methane, 4))
+
+
+class DictEngine:
+    """Engine as laid out before interning"""
+
+    def __init__(self, fuel: Fuel, cylinders: int = 0) -> None:
+        self.fuel = fuel
+        self.cylinders = cylinders
+
+
+class DictBlueprint:
+    """Blueprint as laid out before slots"""
+
+    def __init__(self, engine: DictEngine, transmission: Transmission,
+                 wheels: int, seats: int) -> None:
+        self.engine = engine
+        self.transmission = transmission
+        self.wheels = wheels
+        self.seats = seats
+
+
+def dict_fleet() -> list:
+    return [DictBlueprint(DictEngine(*SPECS[i % 4]), Transmission.manual, 4, 5)
+            for i in range(FLEET)]
+
+
+def compact_fleet() -> list:
+    return [VehicleBlueprint(Engine(*SPECS[i % 4]), Transmission.manual, 4, 5)
+            for i in range(FLEET)]
+
+
+def measure(build: Callable[[], list]) -> float:
+    """Bytes allocated per vehicle while building the fleet"""
+    tracemalloc.start()
+    fleet = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del fleet
+    return size / FLEET
+
+
+def main() -> None:
+    before, after = measure(dict_fleet), measure(compact_fleet)
+    print(f'dict-backed {FLEET} vehicles: {before:.0f} bytes/vehicle')
+    print(f'compact     {FLEET} vehicles: {after:.0f} bytes/vehicle '
+          f'({before / after:.1f}x smaller)')
+
+
+if __name__ == '__main__':
+    main()
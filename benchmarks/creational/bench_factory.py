@@ -0,0 +1,106 @@
+"""Logistics benchmarks
+
+Drains queues of growing size. Time per transport should stay flat,
+showing that draining the queue is linear in its size.
+
+Creates transports one call at a time and in bulk through the registry.
+
+Plans routes for many transports over a grid of cities, with and without
+the shortest path cache.
+
+    python -m benchmarks.creational.bench_factory
+"""
+import gc
+import random
+from time import perf_counter
+
+from design_patterns.creational.factory import (DeliveryRoute, Factory,
+                                                Logistics, RouteGraph,
+                                                Transport, Truck)
+
+SIZES = (10_000, 100_000, 500_000)
+GRID = 30
+ROUTED = 100_000
+CREATED = 500_000
+
+
+class Parcel(Transport):
+    """Transport that delivers without printing"""
+
+    def deliver(self) -> None:
+        self._deliver()
+
+
+def drain(size: int, priorities: dict[str, int] | None = None) -> float:
+    """Fill a queue with size parcels and time deliver_many draining it"""
+    route = DeliveryRoute('London', 'Paris')
+    logistics = Logistics(priorities)
+    for i in range(size):
+        logistics.add_transport(Parcel(route), priority=i % 3 if priorities else None)
+    start = perf_counter()
+    delivered = logistics.deliver_many(size)
+    elapsed = perf_counter() - start
+    assert delivered == size
+    return elapsed
+
+
+def plan(cache_size: int, transports: int) -> float:
+    """Time planning routes for transports between random grid cities"""
+    graph = RouteGraph(cache_size=cache_size)
+    rnd = random.Random(0)
+    for x in range(GRID):
+        for y in range(GRID):
+            if x + 1 < GRID:
+                graph.add_route(DeliveryRoute(f'{x}:{y}', f'{x + 1}:{y}', rnd.uniform(1, 9)))
+            if y + 1 < GRID:
+                graph.add_route(DeliveryRoute(f'{x}:{y}', f'{x}:{y + 1}', rnd.uniform(1, 9)))
+    hubs = [f'{rnd.randrange(GRID)}:{rnd.randrange(GRID)}' for _ in range(20)]
+    cities = [f'{x}:{y}' for x in range(GRID) for y in range(GRID)]
+    trucks = [Truck(DeliveryRoute(rnd.choice(hubs), rnd.choice(cities)))
+              for _ in range(transports)]
+    start = perf_counter()
+    for truck in trucks:
+        graph.plan(truck)
+    return perf_counter() - start
+
+
+def create(routes: list[DeliveryRoute]) -> None:
+    """Time single and bulk transport creation"""
+
+    def single(route_list: list[DeliveryRoute]) -> list[Transport]:
+        return [Factory.createTruck(route) for route in route_list]
+
+    def registry(route_list: list[DeliveryRoute]) -> list[Transport]:
+        return [Factory.create('truck', route) for route in route_list]
+
+    def bulk(route_list: list[DeliveryRoute]) -> list[Transport]:
+        return Factory.create_many('truck', route_list)
+
+    for label, build in (('createTruck', single), ('create', registry), ('create_many', bulk)):
+        start = perf_counter()
+        transports = build(routes)
+        elapsed = perf_counter() - start
+        # Free the batch outside of the timed section
+        del transports
+        gc.collect()
+        print(f'{label:>12} {len(routes)} transports: {elapsed:.3f}s')
+
+
+def main() -> None:
+    for label, priorities in (('fifo', None), ('priority', {'Parcel': 0})):
+        for size in SIZES:
+            elapsed = drain(size, priorities)
+            print(f'{label:>8} {size:>8} transports: {elapsed:.3f}s '
+                  f'({elapsed / size * 1e9:.0f} ns/transport)')
+
+    create([DeliveryRoute('London', 'Paris')] * CREATED)
+
+    cached = plan(cache_size=128, transports=ROUTED)
+    print(f'  cached {ROUTED:>8} routes: {cached:.3f}s')
+    uncached = plan(cache_size=0, transports=ROUTED // 100)
+    print(f'uncached {ROUTED // 100:>8} routes: {uncached:.3f}s '
+          f'(~{uncached * 100:.1f}s for {ROUTED})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Prototype cloning benchmark
+
+Clones a prototype many times with copy.copy(), the per-call clone() and
+the bulk Prototype.spawn().
+
+Sums areas of many shapes one object at a time and with a ShapeBatch.
+
+Queries a ShapeGrid of growing size and compares with a linear scan.
+
+Compares building a large registry in Python with opening a snapshot of it.
+
+    python -m benchmarks.creational.bench_prototype
+"""
+import copy
+import gc
+import random
+import tempfile
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+from design_patterns.creational.prototype import (Circle, Prototype,
+                                                  Rectangle, Shape, ShapeBatch,
+                                                  ShapeGrid, np)
+
+CLONES = 500_000
+REGISTRY = 50_000
+GRID_SIZES = (10_000, 100_000, 1_000_000)
+WORLD = 10_000
+QUERIES = 1_000
+
+
+def copy_clones() -> list[Shape]:
+    shape = Prototype.cache[1]
+    return [copy.copy(shape) for _ in range(CLONES)]
+
+
+def get_shape_clones() -> list[Shape]:
+    return [Prototype.get_shape(1) for _ in range(CLONES)]
+
+
+def spawn_clones() -> list[Shape]:
+    return Prototype.spawn(1, CLONES)
+
+
+def measure(build: Callable[[], list[Shape]]) -> float:
+    start = perf_counter()
+    shapes = build()
+    elapsed = perf_counter() - start
+    # Free the clones outside of the timed section
+    del shapes
+    gc.collect()
+    return elapsed
+
+
+def build_registry() -> None:
+    for sid in range(1, REGISTRY + 1):
+        shape = Rectangle(sid, 2, name=f'Template {sid}') if sid % 2 else Circle(sid)
+        shape.set_id(sid)
+        Prototype.cache[sid] = shape
+
+
+def cold_start() -> None:
+    start = perf_counter()
+    build_registry()
+    print(f'    build {REGISTRY} prototypes: {perf_counter() - start:.4f}s')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'shapes.bin'
+        Prototype.save(path)
+        Prototype.cache = {}
+        start = perf_counter()
+        Prototype.open(path)
+        Prototype.get_shape(REGISTRY // 2)
+        print(f'     open {REGISTRY} prototypes: {perf_counter() - start:.4f}s '
+              '(including first get_shape)')
+        if Prototype.snapshot is not None:
+            Prototype.snapshot.close()
+            Prototype.snapshot = None
+
+
+def total_area() -> None:
+    shapes = Prototype.spawn(1, CLONES // 2) + Prototype.spawn(3, CLONES // 2)
+    start = perf_counter()
+    sum(shape.get_area() for shape in shapes)
+    print(f' get_area {CLONES} shapes: {perf_counter() - start:.3f}s')
+
+    batch = ShapeBatch.from_shapes(shapes)
+    start = perf_counter()
+    batch.total_area()
+    backend = 'numpy' if np is not None else 'array'
+    print(f'    batch {CLONES} shapes: {perf_counter() - start:.3f}s ({backend})')
+
+
+def spatial() -> None:
+    rnd = random.Random(0)
+    points = [(rnd.uniform(0, WORLD), rnd.uniform(0, WORLD)) for _ in range(QUERIES)]
+    for size in GRID_SIZES:
+        shapes = Prototype.spawn(3, size)
+        for shape in shapes:
+            shape.x, shape.y = rnd.uniform(0, WORLD), rnd.uniform(0, WORLD)  # type: ignore
+        grid = ShapeGrid(cell_size=10)
+        grid.extend(shapes)
+
+        start = perf_counter()
+        for x, y in points:
+            grid.query(x - 50, y - 50, x + 50, y + 50)
+        ranged = (perf_counter() - start) / QUERIES
+
+        start = perf_counter()
+        for x, y in points:
+            grid.nearest(x, y)
+        nearest = (perf_counter() - start) / QUERIES
+
+        start = perf_counter()
+        x, y = points[0]
+        min(shapes, key=lambda s: (s.x - x) ** 2 + (s.y - y) ** 2)
+        scan = perf_counter() - start
+
+        print(f'grid {size:>8} shapes: range {ranged * 1e6:.0f} us, '
+              f'nearest {nearest * 1e6:.0f} us, linear scan {scan * 1e6:.0f} us')
+        del shapes, grid
+        gc.collect()
+
+
+def main() -> None:
+    Prototype.load()
+    for label, build in (('copy.copy', copy_clones),
+                         ('get_shape', get_shape_clones),
+                         ('spawn', spawn_clones)):
+        print(f'{label:>9} {CLONES} clones: {measure(build):.3f}s')
+
+    total_area()
+    spatial()
+    cold_start()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Database singleton benchmark
+
+Inserts rows into an on-disk database with one query() per row, with a
+single query_many() and with concurrent aquery() calls.
+
+    python -m benchmarks.creational.bench_singleton
+"""
+import asyncio
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+from design_patterns.creational.singleton import DatabasePrototype
+
+ROWS = 2_000
+INSERT = 'INSERT INTO Events (id, name) VALUES (?, ?);'
+
+
+async def concurrent_reads(db: DatabasePrototype) -> None:
+    await asyncio.gather(*(db.aquery('SELECT name FROM Events WHERE id = ?;', (i,))
+                           for i in range(ROWS)))
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        DatabasePrototype.database = (Path(tmp) / 'bench.db').as_uri()
+        db = DatabasePrototype.instance()
+        db.query('CREATE TABLE Events (id INTEGER, name TEXT);')
+
+        start = perf_counter()
+        for i in range(ROWS):
+            db.query(INSERT, (i, f'event {i}'))
+        print(f'     query {ROWS} rows: {perf_counter() - start:.3f}s')
+
+        start = perf_counter()
+        db.query_many(INSERT, ((i, f'event {i}') for i in range(ROWS)))
+        print(f'query_many {ROWS} rows: {perf_counter() - start:.3f}s')
+
+        start = perf_counter()
+        for i in range(ROWS):
+            db.query('SELECT name FROM Events WHERE id = ?;', (i,))
+        print(f'     query {ROWS} reads: {perf_counter() - start:.3f}s')
+
+        start = perf_counter()
+        asyncio.run(concurrent_reads(db))
+        print(f'    aquery {ROWS} reads: {perf_counter() - start:.3f}s')
+
+        db.executor.shutdown()
+        db.pool.close()
+
+
+if __name__ == '__main__':
+    main()
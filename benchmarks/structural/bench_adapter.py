@@ -0,0 +1,133 @@
+"""Adapter conversion benchmark
+
+Converts articles between JSON and XML with reflection on every call (the
+previous parser implementation) and with the cached MediaSchema.
+
+Encodes and decodes articles with the JSON, XML and binary parsers, one
+record at a time and as a binary batch.
+
+Converts a re-polled feed with and without the conversion cache.
+
+Converts an NDJSON dump to XML and back with one and several workers.
+
+    python -m benchmarks.structural.bench_adapter
+"""
+import json
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+from dataclasses import asdict
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Type
+from xml.dom import minidom
+
+from design_patterns.structural.adapter import (Adapter, BinaryMediaParser,
+                                                JSONMediaParser, MediaClass,
+                                                MediaParser, NewsArticle,
+                                                XMLMediaParser)
+
+ARTICLES = 100_000
+
+
+def legacy_xml_parse(cls_type: Type[MediaClass], string: str) -> MediaClass:
+    # Untyped, minidom node types do not describe child text nodes
+    root: Any = minidom.parseString(string).childNodes[0]
+    keys = {}
+    for key in asdict(cls_type()):
+        for node in root.childNodes:
+            if node.nodeName == key:
+                keys[key] = node.childNodes[0].data
+    return cls_type(**keys)
+
+
+def legacy_xml_to_text(cls: MediaClass) -> str:
+    root = ET.Element(type(cls).__name__)
+    for key in asdict(cls):
+        ET.SubElement(root, key).text = getattr(cls, key)
+    return ET.tostring(root, encoding='unicode')
+
+
+def legacy_json_to_xml(cls_type: Type[MediaClass], string: str) -> str:
+    return legacy_xml_to_text(JSONMediaParser.parse(cls_type, string))
+
+
+def legacy_xml_to_json(cls_type: Type[MediaClass], string: str) -> str:
+    return json.dumps(asdict(legacy_xml_parse(cls_type, string)))
+
+
+def measure(convert: Callable[[Type[MediaClass], str], str], documents: list[str]) -> float:
+    start = perf_counter()
+    for document in documents:
+        convert(NewsArticle, document)
+    return perf_counter() - start
+
+
+def codecs(articles: list[NewsArticle]) -> None:
+    parsers: tuple[MediaParser[Any], ...] = (
+        JSONMediaParser(), XMLMediaParser(), BinaryMediaParser())
+    for parser in parsers:
+        start = perf_counter()
+        encoded = [parser.to_text(article) for article in articles]
+        encode = perf_counter() - start
+        start = perf_counter()
+        for document in encoded:
+            parser.parse(NewsArticle, document)
+        decode = perf_counter() - start
+        size = sum(len(document) for document in encoded)
+        print(f'{type(parser).__name__:<17} encode {encode:.3f}s, decode {decode:.3f}s, '
+              f'{size / len(encoded):.0f} bytes/record')
+
+    start = perf_counter()
+    batch = BinaryMediaParser.to_text_many(articles)
+    encode = perf_counter() - start
+    start = perf_counter()
+    BinaryMediaParser.parse_many(NewsArticle, batch)
+    decode = perf_counter() - start
+    print(f'{"binary batch":<17} encode {encode:.3f}s, decode {decode:.3f}s, '
+          f'{len(batch) / len(articles):.0f} bytes/record')
+
+
+def cached(documents: list[str], polls: int = 5) -> None:
+    before = measure(Adapter.json_to_xml, documents * polls)
+    cache = Adapter.enable_cache(maxsize=len(documents))
+    try:
+        after = measure(Adapter.json_to_xml, documents * polls)
+    finally:
+        Adapter.disable_cache()
+    print(f'json_to_xml {polls} polls: uncached {before:.3f}s, cached {after:.3f}s '
+          f'({before / after:.1f}x, hit rate {cache.stats.hit_rate:.0%})')
+
+
+def bulk(articles: list[NewsArticle]) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        src, xml, out = (Path(tmp) / name for name in ('in.ndjson', 'out.xml', 'out.ndjson'))
+        with open(src, 'w', encoding='utf-8') as file:
+            file.writelines(f'{JSONMediaParser.to_text(a)}\n' for a in articles)
+        for workers in (1, max(2, os.cpu_count() or 1)):
+            stats = Adapter.ndjson_to_xml(NewsArticle, src, xml, workers=workers)
+            print(f'ndjson_to_xml {workers:>2} worker(s): {stats.throughput:,.0f} records/s')
+            stats = Adapter.xml_to_ndjson(NewsArticle, xml, out, workers=workers)
+            print(f'xml_to_ndjson {workers:>2} worker(s): {stats.throughput:,.0f} records/s')
+
+
+def main() -> None:
+    articles = [NewsArticle(title=f'Article {i}', text='Some & more <text>')
+                for i in range(ARTICLES)]
+    json_docs = [JSONMediaParser.to_text(article) for article in articles]
+    xml_docs = [Adapter.json_to_xml(NewsArticle, doc) for doc in json_docs]
+
+    for label, legacy, schema, docs in (
+            ('json_to_xml', legacy_json_to_xml, Adapter.json_to_xml, json_docs),
+            ('xml_to_json', legacy_xml_to_json, Adapter.xml_to_json, xml_docs)):
+        before, after = measure(legacy, docs), measure(schema, docs)
+        print(f'{label} {ARTICLES} articles: reflection {before:.3f}s, '
+              f'schema {after:.3f}s ({before / after:.1f}x)')
+
+    codecs(articles)
+    cached(json_docs[:10_000])
+    bulk(articles)
+
+
+if __name__ == '__main__':
+    main()
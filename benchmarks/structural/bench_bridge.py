@@ -0,0 +1,150 @@
+"""Bridge remote benchmark
+
+Turns up the volume of a group and powers off every radio of a large
+fleet, one BridgeRemote per device and with DeviceFleet bulk operations.
+
+Sends bursts of button presses to a slow device, each press right away and
+coalesced by an AsyncBridgeRemote.
+
+Syncs a replica of tracked devices after a few changes, by copying every
+device state and with a StateJournal delta. Tracks a large fleet and takes
+deltas of a bulk change and of a bulk operation that changes nothing.
+
+    python -m benchmarks.structural.bench_bridge
+"""
+import asyncio
+import time
+from dataclasses import asdict
+from time import perf_counter
+
+from design_patterns.structural.bridge import (TV, AsyncBridgeRemote,
+                                               BridgeRemote, DeviceFleet,
+                                               DeviceState, Radio, StateJournal,
+                                               StateReplica, np)
+
+DEVICES = 1_000_000
+BURSTS = 20
+TRACKED = 100_000
+LATENCY = 0.002
+
+
+class SlowTV(TV):
+    """TV behind a network hop"""
+
+    def get_volume(self) -> int:
+        time.sleep(LATENCY)
+        return super().get_volume()
+
+    def set_volume(self, volume: int) -> None:
+        time.sleep(LATENCY)
+        super().set_volume(volume)
+
+
+def objects() -> tuple[float, float]:
+    devices = [TV() if i % 2 else Radio() for i in range(DEVICES)]
+    lobby = [BridgeRemote(device) for device in devices[::4]]
+    start = perf_counter()
+    for remote in lobby:
+        remote.volume_up()
+    volume = perf_counter() - start
+    start = perf_counter()
+    for device in devices:
+        if isinstance(device, Radio) and device.is_enabled():
+            device.toggle_power()
+    power = perf_counter() - start
+    return volume, power
+
+
+def fleet() -> tuple[float, float]:
+    fleet = DeviceFleet()
+    for _ in range(DEVICES // 2):
+        fleet.add(Radio)
+        fleet.add(TV)
+    fleet.add_to_group('lobby', range(0, DEVICES, 4))
+    start = perf_counter()
+    fleet.volume_up(group='lobby')
+    volume = perf_counter() - start
+    start = perf_counter()
+    fleet.power_off(kind=Radio)
+    power = perf_counter() - start
+    return volume, power
+
+
+def presses(remote: BridgeRemote) -> None:
+    for _ in range(5):
+        remote.volume_up()
+    remote.volume_down()
+
+
+async def coalesced() -> tuple[float, AsyncBridgeRemote]:
+    remote = AsyncBridgeRemote(SlowTV(), window=0.001)
+    start = perf_counter()
+    for _ in range(BURSTS):
+        presses(remote)
+        await remote.flush()
+    return perf_counter() - start, remote
+
+
+def sync() -> None:
+    journal, replica = StateJournal(), StateReplica()
+    devices = [journal.track(TV(), i) for i in range(TRACKED)]
+    replica.sync(journal)
+    for device in devices[::100]:
+        device.set_volume(device.get_volume() + 10)
+
+    start = perf_counter()
+    copied = {i: DeviceState(**asdict(device.state)) for i, device in enumerate(devices)}
+    before = perf_counter() - start
+    start = perf_counter()
+    changed = replica.sync(journal)
+    after = perf_counter() - start
+    assert replica.states[100] == copied[100]
+    print(f'sync {TRACKED} devices, {changed} changed: full copy {before:.3f}s, '
+          f'delta {after:.4f}s ({before / after:.0f}x)')
+
+
+def fleet_sync() -> None:
+    fleet = DeviceFleet()
+    fleet.add(TV, DEVICES // 2, group='lobby')
+    fleet.add(Radio, DEVICES // 2)
+    journal = StateJournal()
+    start = perf_counter()
+    journal.track_fleet(fleet)
+    track = perf_counter() - start
+    version = journal.version
+    fleet.volume_up(group='lobby')
+    start = perf_counter()
+    changed = len(journal.delta(version))
+    delta = perf_counter() - start
+    version = journal.version
+    fleet.power_off()
+    unchanged = len(journal.delta(version))
+    print(f'track fleet of {DEVICES} devices: {track:.3f}s; delta of {changed} changes '
+          f'{delta:.3f}s; power off of powered off fleet: {unchanged} changes')
+
+
+def main() -> None:
+    backend = 'numpy' if np is not None else 'array'
+    (volume_before, power_before), (volume_after, power_after) = objects(), fleet()
+    print(f'volume_up group of {DEVICES // 4} devices: objects {volume_before:.3f}s, '
+          f'fleet ({backend}) {volume_after:.3f}s ({volume_before / volume_after:.1f}x)')
+    print(f'power off {DEVICES // 2} radios: objects {power_before:.3f}s, '
+          f'fleet ({backend}) {power_after:.3f}s ({power_before / power_after:.1f}x)')
+
+    remote = BridgeRemote(SlowTV())
+    start = perf_counter()
+    for _ in range(BURSTS):
+        presses(remote)
+    before = perf_counter() - start
+    after, async_remote = asyncio.run(coalesced())
+    stats = async_remote.stats
+    print(f'{BURSTS} bursts of 6 presses: immediate {before:.3f}s, coalesced {after:.3f}s '
+          f'({before / after:.1f}x, {stats.merged_calls} of '
+          f'{stats.device_calls + stats.merged_calls} device calls merged)')
+
+    sync()
+    fleet_sync()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,10 @@
 from abc import ABC
+from array import array
 from enum import Enum
+from itertools import compress
+from typing import Callable, Iterator
+
+from design_patterns.events import bus
 
 
 class Style(Enum):
@@ -33,6 +38,68 @@ class Sofa(Furniture):
     pass
 
 
+class FurnitureInventory:
+    """Furniture Inventory class
+    Columnar store that keeps each item as a single byte encoding its kind
+    and style. Counts and filters run over the whole column at once, while
+    Furniture objects are only created when an item is accessed.
+    """
+
+    kinds: tuple[type[Furniture], ...] = (Chair, Table, Sofa)
+    styles: tuple[Style, ...] = tuple(Style)
+
+    def __init__(self) -> None:
+        self._codes = array('B')
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __getitem__(self, index: int) -> Furniture:
+        kind, style = divmod(self._codes[index], len(self.styles))
+        return self.kinds[kind](self.styles[style])
+
+    def __iter__(self) -> Iterator[Furniture]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def code(self, kind: type[Furniture], style: Style) -> int:
+        return self.kinds.index(kind) * len(self.styles) + self.styles.index(style)
+
+    def add(self, furniture: Furniture) -> None:
+        self._codes.append(self.code(type(furniture), furniture.style))
+
+    def add_many(self, kind: type[Furniture], style: Style, n: int) -> None:
+        """Add n items of the same kind and style"""
+        self._codes.extend(array('B', [self.code(kind, style)]) * n)
+
+    def _mask(self,
+              kind: type[Furniture] | None,
+              style: Style | None) -> bytes:
+        """Column of 1 for matching items and 0 for the rest"""
+        table = bytearray(256)
+        for k in range(len(self.kinds)):
+            for s in range(len(self.styles)):
+                if kind in (None, self.kinds[k]) and style in (None, self.styles[s]):
+                    table[k * len(self.styles) + s] = 1
+        return self._codes.tobytes().translate(table)
+
+    def count(self,
+              kind: type[Furniture] | None = None,
+              style: Style | None = None) -> int:
+        """Number of items of kind and style (any if not specified)"""
+        if kind is None and style is None:
+            return len(self)
+        if kind is not None and style is not None:
+            return self._codes.tobytes().count(self.code(kind, style))
+        return self._mask(kind, style).count(1)
+
+    def filter(self,
+               kind: type[Furniture] | None = None,
+               style: Style | None = None) -> list[int]:
+        """Indices of items of kind and style (any if not specified)"""
+        return list(compress(range(len(self)), self._mask(kind, style)))
+
+
 class AbstractFurnitureFactory(ABC):
     """Abstract Furniture Factory class"""
 
@@ -41,19 +108,54 @@ class AbstractFurnitureFactory(ABC):
 
     def make_chair(self) -> Chair:
         """Chair creation method """
-        print(f'{self.style} style Chair created')
+        if bus.enabled:
+            bus.emit('Chair', 'created', style=self.style.value)
         return Chair(self.style)
 
     def make_table(self) -> Table:
         """Table creation method """
-        print(f'{self.style} style Table created')
+        if bus.enabled:
+            bus.emit('Table', 'created', style=self.style.value)
         return Table(self.style)
 
     def make_sofa(self) -> Sofa:
         """Sofa creation method """
-        print(f'{self.style} style Sofa created')
+        if bus.enabled:
+            bus.emit('Sofa', 'created', style=self.style.value)
         return Sofa(self.style)
 
+    def make_chairs(self, n: int) -> list[Chair]:
+        """Batch chair creation method"""
+        style = self.style
+        chairs = [Chair(style) for _ in range(n)]
+        if bus.enabled:
+            bus.emit('Chair', 'created', style=style.value, count=n)
+        return chairs
+
+    def make_tables(self, n: int) -> list[Table]:
+        """Batch table creation method"""
+        style = self.style
+        tables = [Table(style) for _ in range(n)]
+        if bus.enabled:
+            bus.emit('Table', 'created', style=style.value, count=n)
+        return tables
+
+    def make_sofas(self, n: int) -> list[Sofa]:
+        """Batch sofa creation method"""
+        style = self.style
+        sofas = [Sofa(style) for _ in range(n)]
+        if bus.enabled:
+            bus.emit('Sofa', 'created', style=style.value, count=n)
+        return sofas
+
+    def make_set(self, n: int = 1) -> list[tuple[Chair, Table, Sofa]]:
+        """Batch creation of n matching chair, table and sofa sets"""
+        style = self.style
+        sets = [(Chair(style), Table(style), Sofa(style)) for _ in range(n)]
+        if bus.enabled:
+            bus.emit('FurnitureSet', 'created', style=style.value, count=n)
+        return sets
+
 
 class VictorianFurnitureFactory(AbstractFurnitureFactory):
     """Victorian Furniture Factory class"""
@@ -77,17 +179,27 @@ class ArtDecoFurnitureFactory(AbstractFurnitureFactory):
 
 
 class AbstractFactory:
-    """Abstract factory"""
+    """Abstract factory
+    Factories hold no state besides their style, so one instance per style
+    is created on first use and shared afterwards.
+    """
+
+    factories: dict[Style, Callable[[], AbstractFurnitureFactory]] = {
+        Style.victorian: VictorianFurnitureFactory,
+        Style.modern: ModernFurnitureFactory,
+        Style.art_deco: ArtDecoFurnitureFactory,
+    }
+    _instances: dict[str, AbstractFurnitureFactory] = {}
 
     @staticmethod
-    def new(style: str) -> AbstractFurnitureFactory:
-        match style:
-            case Style.victorian.value:
-                return VictorianFurnitureFactory()
-            case Style.modern.value:
-                return ModernFurnitureFactory()
-            case Style.art_deco.value:
-                return ArtDecoFurnitureFactory()
-            case _:
+    def new(style: str | Style) -> AbstractFurnitureFactory:
+        name = style.value if isinstance(style, Style) else style
+        factory = AbstractFactory._instances.get(name)
+        if factory is None:
+            try:
+                factory = AbstractFactory.factories[Style(name)]()
+            except (ValueError, KeyError):
                 raise Exception(
-                    f'No factory that produces furniture in the {style} style')
+                    f'No factory that produces furniture in the {style} style') from None
+            AbstractFactory._instances[name] = factory
+        return factory
@@ -1,6 +1,12 @@
 from abc import ABC
-from dataclasses import dataclass
+from concurrent.futures import (Executor, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from dataclasses import dataclass, field
 from enum import Enum
+from time import perf_counter
+from typing import Sequence
+
+from design_patterns.events import bus
 
 
 class Fuel(Enum):
@@ -17,17 +23,41 @@ class Transmission(Enum):
     automatic = 2
 
 
-@dataclass
 class Engine:
-    """Engine Data Class"""
+    """Engine class
+    Engines are immutable and interned by (fuel, cylinders), so every
+    vehicle with the same engine spec shares a single Engine object.
+    """
+
+    __slots__ = ('fuel', 'cylinders')
+
+    _pool: dict[tuple[Fuel, int], 'Engine'] = {}
+
+    fuel: Fuel
+    cylinders: int
+
+    def __new__(cls, fuel: Fuel, cylinders: int = 0) -> 'Engine':
+        engine = cls._pool.get((fuel, cylinders))
+        if engine is None:
+            if fuel == fuel.electric and cylinders > 0:
+                raise Exception('And electric engine does not have cylinders')
+            if fuel != fuel.electric and cylinders < 1:
+                raise Exception('A non electric engine needs cylinders')
+            engine = super().__new__(cls)
+            object.__setattr__(engine, 'fuel', fuel)
+            object.__setattr__(engine, 'cylinders', cylinders)
+            cls._pool[fuel, cylinders] = engine
+        return engine
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError('Engine is immutable')
+
+    def __reduce__(self) -> tuple[type['Engine'], tuple[Fuel, int]]:
+        # Unpickled engines are interned in the receiving process
+        return Engine, (self.fuel, self.cylinders)
 
-    def __init__(self, fuel: Fuel, cylinders: int = 0):
-        if fuel == fuel.electric and cylinders > 0:
-            raise Exception('And electric engine does not have cylinders')
-        if fuel != fuel.electric and cylinders < 1:
-            raise Exception('A non electric engine needs cylinders')
-        self.fuel = fuel
-        self.cylinders = cylinders
+    def __repr__(self) -> str:
+        return f'Engine(fuel={self.fuel}, cylinders={self.cylinders})'
 
     def __str__(self) -> str:
         if self.fuel != Fuel.electric:
@@ -35,13 +65,13 @@ class Engine:
         return f'Engine ({self.fuel.name})'
 
 
-@dataclass
+@dataclass(slots=True)
 class AbstractVehicle(ABC):
     """Abstract Vehicle Data Class"""
-    engine = None
-    transmission = None
-    wheels = None
-    seats = None
+    engine: Engine | None = None
+    transmission: Transmission | None = None
+    wheels: int | None = None
+    seats: int | None = None
 
     def set_engine(self, engine: Engine) -> None:
         self.engine = engine
@@ -60,6 +90,9 @@ class AbstractVehicle(ABC):
 class VehicleBlueprint(AbstractVehicle):
     """Vehicle Blueprint Data Class"""
 
+    # Fields are slotted on AbstractVehicle, redeclaring them would add slots
+    __slots__ = ()
+
     def __init__(self, engine: Engine, transmission: Transmission, wheels: int, seats: int):
         if wheels < 1:
             raise Exception('A vehicle must have wheels')
@@ -75,6 +108,8 @@ class VehicleBlueprint(AbstractVehicle):
 class VehicleBuilt(AbstractVehicle):
     """Vehicle Built Data Class"""
 
+    __slots__ = ()
+
     @property
     def is_built(self) -> bool:
         if None in (self.engine, self.transmission, self.wheels, self.seats):
@@ -85,31 +120,92 @@ class VehicleBuilt(AbstractVehicle):
 class VehicleBuilder:
     """Vehicle Builder class"""
 
-    vehicle = VehicleBuilt()
+    stages = ('engine', 'transmission', 'wheels', 'seats')
 
     def __init__(self, blueprint: VehicleBlueprint):
         self.blueprint = blueprint
+        self.vehicle = VehicleBuilt()
 
     def build_engine(self):
         self.vehicle.set_engine(self.blueprint.engine)
-        print(f'Engine for vehicle was installed')
+        if bus.enabled:
+            bus.emit('VehicleBuilder', 'installed', part='engine')
 
     def build_transmission(self):
         self.vehicle.set_transmission(self.blueprint.transmission)
-        print(f'Transmission for vehicle was installed')
+        if bus.enabled:
+            bus.emit('VehicleBuilder', 'installed', part='transmission')
 
     def build_wheels(self):
         self.vehicle.set_wheels(self.blueprint.wheels)
-        print(f'Wheels for vehicle were installed')
+        if bus.enabled:
+            bus.emit('VehicleBuilder', 'installed', part='wheels')
 
     def build_seats(self):
         self.vehicle.set_seats(self.blueprint.seats)
-        print(f'Seats for vehicle were installed')
+        if bus.enabled:
+            bus.emit('VehicleBuilder', 'installed', part='seats')
 
     def export(self) -> VehicleBuilt | None:
         if self.vehicle.is_built:
             exported_vehicle, self.vehicle = self.vehicle, VehicleBuilt()
-            print('Vehicle exported!')
+            if bus.enabled:
+                bus.emit('VehicleBuilder', 'exported')
             return exported_vehicle
-        print('Vehicle is not built, cannot export!')
+        if bus.enabled:
+            bus.emit('VehicleBuilder', 'export_failed')
         return None
+
+    def build(self) -> tuple[VehicleBuilt, dict[str, float]]:
+        """Run all build stages and export, returns vehicle and stage timings"""
+        timings = {}
+        for stage in self.stages:
+            start = perf_counter()
+            getattr(self, f'build_{stage}')()
+            timings[stage] = perf_counter() - start
+        vehicle = self.export()
+        if vehicle is None:
+            raise RuntimeError('Vehicle was not built')
+        return vehicle, timings
+
+    @staticmethod
+    def build_fleet(blueprints: Sequence[VehicleBlueprint],
+                    workers: int = 1,
+                    processes: bool = False,
+                    chunksize: int = 64) -> 'FleetBuild':
+        """Build a vehicle for every blueprint
+        Vehicles are built in a thread pool (or a process pool if processes
+        is set) of workers and returned in input order.
+        """
+
+        start = perf_counter()
+        fleet = FleetBuild(timings={stage: 0.0 for stage in VehicleBuilder.stages})
+        if workers > 1:
+            pool: Executor = (ProcessPoolExecutor(workers) if processes
+                              else ThreadPoolExecutor(workers))
+            with pool:
+                results = list(pool.map(_build_vehicle, blueprints, chunksize=chunksize))
+        else:
+            results = [_build_vehicle(blueprint) for blueprint in blueprints]
+        for vehicle, timings in results:
+            fleet.vehicles.append(vehicle)
+            for stage, elapsed in timings.items():
+                fleet.timings[stage] += elapsed
+        fleet.elapsed = perf_counter() - start
+        return fleet
+
+
+@dataclass
+class FleetBuild:
+    """Fleet Build Data Class
+    Built vehicles in blueprint order, time spent in each stage summed
+    over all vehicles and wall clock time of the whole build.
+    """
+    vehicles: list[VehicleBuilt] = field(default_factory=list)
+    timings: dict[str, float] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+
+def _build_vehicle(blueprint: VehicleBlueprint) -> tuple[VehicleBuilt, dict[str, float]]:
+    # Module level so it can be sent to a process pool
+    return VehicleBuilder(blueprint).build()
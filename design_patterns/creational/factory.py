@@ -1,12 +1,24 @@
+import asyncio
+import heapq
 from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from functools import partial
+from time import perf_counter
+from typing import Callable, Iterable, Iterator
+
+from design_patterns.events import bus
+
+DEFAULT_PRIORITY = 0
 
 
 class DeliveryRoute:
     """DeliveryRoute class"""
 
-    def __init__(self, fr: str, to: str,) -> None:
+    def __init__(self, fr: str, to: str, distance: float = 1.0) -> None:
         self.fr = fr
         self.to = to
+        self.distance = distance
 
     def reverse(self) -> None:
         self.to, self.fr = self.fr, self.to
@@ -16,10 +28,19 @@ class DeliveryRoute:
 
 
 class Transport(ABC):
-    """Abstract transport class"""
+    """Abstract transport class
+    Subclasses register themselves by lowercase class name
+    """
+
+    registry: dict[str, type['Transport']] = {}
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        Transport.registry[cls.__name__.lower()] = cls
 
-    def __init__(self, route: DeliveryRoute) -> None:
+    def __init__(self, route: DeliveryRoute, delivery_time: float = 0.0) -> None:
         self.route = route
+        self.delivery_time = delivery_time
 
     @property
     def fr(self) -> str:
@@ -41,13 +62,19 @@ class Transport(ABC):
         """Delivery abstract transport implementation """
         pass
 
+    async def adeliver(self) -> None:
+        """Asynchronous delivery, waits delivery_time before delivering"""
+        await asyncio.sleep(self.delivery_time)
+        self.deliver()
+
 
 class Truck(Transport):
     """Concrete Truck transport class"""
 
     def deliver(self) -> None:
         self._deliver()
-        print('Truck delivered')
+        if bus.enabled:
+            bus.emit('Truck', 'delivered', route=str(self.route))
 
 
 class Ship(Transport):
@@ -55,7 +82,8 @@ class Ship(Transport):
 
     def deliver(self) -> None:
         self._deliver()
-        print('Ship delivered')
+        if bus.enabled:
+            bus.emit('Ship', 'delivered', route=str(self.route))
 
 
 class Train(Transport):
@@ -63,14 +91,74 @@ class Train(Transport):
 
     def deliver(self) -> None:
         self._deliver()
-        print('Train delivered')
+        if bus.enabled:
+            bus.emit('Train', 'delivered', route=str(self.route))
+
+
+class DispatchQueue:
+    """Dispatch Queue class
+    Transports are grouped into priority classes by transport name.
+    Each class is a FIFO deque, and a heap keeps track of the non-empty
+    classes, so push and pop do not depend on the number of queued transports.
+    Lower priority values are dispatched first.
+    """
+
+    def __init__(self, priorities: dict[str, int] | None = None) -> None:
+        self.priorities = priorities if priorities else {}
+        self._lanes: dict[int, deque[Transport]] = {}
+        self._levels: list[int] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Transport]:
+        """Iterate over transports in dispatch order without removing them"""
+        for level in sorted(self._levels):
+            yield from self._lanes[level]
+
+    def priority_of(self, transport: Transport) -> int:
+        return self.priorities.get(transport.name, DEFAULT_PRIORITY)
+
+    def push(self,
+             transport: Transport,
+             priority: int | None = None,
+             front: bool = False) -> None:
+        """Add transport to the end (or the front) of its priority class"""
+        level = self.priority_of(transport) if priority is None else priority
+        lane = self._lanes.get(level)
+        if lane is None:
+            lane = self._lanes[level] = deque()
+        if not lane:
+            heapq.heappush(self._levels, level)
+        if front:
+            lane.appendleft(transport)
+        else:
+            lane.append(transport)
+        self._size += 1
+
+    def pop_item(self) -> tuple[int, Transport]:
+        """Remove the next transport to dispatch, returns priority and transport"""
+        if not self._size:
+            raise IndexError('pop from an empty dispatch queue')
+        level = self._levels[0]
+        lane = self._lanes[level]
+        transport = lane.popleft()
+        if not lane:
+            heapq.heappop(self._levels)
+        self._size -= 1
+        return level, transport
+
+    def pop(self) -> Transport:
+        """Remove and return the next transport to dispatch"""
+        return self.pop_item()[1]
 
 
 class Logistics:
     """Logistics Class"""
 
-    def __init__(self) -> None:
-        self.queue: list[Transport] = []
+    def __init__(self, priorities: dict[str, int] | None = None) -> None:
+        self.queue = DispatchQueue(priorities)
 
     def __len__(self) -> int:
         return len(self.queue)
@@ -78,28 +166,306 @@ class Logistics:
     def __str__(self) -> str:
         return f'Logistics ({len(self)} in queue) {", ".join([x.name for x in self.queue])}'
 
-    def add_transport(self, transport: Transport) -> None:
+    def add_transport(self, transport: Transport, priority: int | None = None) -> None:
         """Add transport"""
-        self.queue.append(transport)
+        self.queue.push(transport, priority)
 
     def deliver(self) -> None:
         """Deliver first transport in queue"""
 
         if not len(self):
-            print('No transport in queue')
+            if bus.enabled:
+                bus.emit('Logistics', 'empty')
             return
-        t = self.queue.pop(0)
+        t = self.queue.pop()
         t.deliver()
-        print(f'Delivered {t.name} on {t.route}')
+
+    def deliver_many(self, n: int | None = None) -> int:
+        """Deliver up to n transports from queue (all if n is not set)
+        Returns number of delivered transports
+        """
+
+        count = len(self) if n is None else min(n, len(self))
+        pop = self.queue.pop
+        for _ in range(count):
+            pop().deliver()
+        if bus.enabled:
+            bus.emit('Logistics', 'delivered_many', count=count)
+        return count
+
+
+@dataclass
+class DeliveryStats:
+    """Delivery Stats Data Class"""
+    delivered: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    cancelled: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Delivered transports per second"""
+        if not self.elapsed:
+            return 0.0
+        return self.delivered / self.elapsed
+
+
+class AsyncLogistics(Logistics):
+    """Async Logistics Class
+    Delivers queued transports concurrently. A fixed pool of worker tasks
+    pulls from the dispatch queue, so at most `concurrency` deliveries run
+    at the same time and memory does not grow with the queue size.
+    """
+
+    def __init__(self, priorities: dict[str, int] | None = None) -> None:
+        super().__init__(priorities)
+        self.stats = DeliveryStats()
+        self._workers: list[asyncio.Task] = []
+        # Transports being delivered with their priority, in dispatch order
+        self._in_flight: list[tuple[int, Transport]] = []
+
+    async def _worker(self, stats: DeliveryStats, timeout: float | None) -> None:
+        while len(self.queue):
+            entry = self.queue.pop_item()
+            self._in_flight.append(entry)
+            try:
+                await asyncio.wait_for(entry[1].adeliver(), timeout)
+            except asyncio.TimeoutError:
+                stats.timed_out += 1
+            except asyncio.CancelledError:
+                # Interrupted transport is put back by deliver_all
+                stats.cancelled += 1
+                raise
+            except Exception:
+                stats.failed += 1
+            else:
+                stats.delivered += 1
+            self._in_flight.remove(entry)
+
+    async def deliver_all(self,
+                          concurrency: int = 10,
+                          timeout: float | None = None) -> DeliveryStats:
+        """Deliver all transports in queue, at most concurrency at a time
+        Each transport gets timeout seconds to deliver (no limit if not set)
+        """
+
+        if concurrency < 1:
+            raise ValueError('Concurrency must be at least 1')
+        self.stats = stats = DeliveryStats()
+        start = perf_counter()
+        self._workers = [asyncio.create_task(self._worker(stats, timeout))
+                         for _ in range(min(concurrency, len(self)))]
+        try:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+        finally:
+            # Interrupted transports go back to the front of their lanes,
+            # in the order they were dispatched
+            for priority, t in reversed(self._in_flight):
+                self.queue.push(t, priority, front=True)
+            self._in_flight = []
+            stats.elapsed = perf_counter() - start
+            self._workers = []
+        return stats
+
+    def cancel(self) -> None:
+        """Cancel running deliveries, undelivered transports stay in queue"""
+        for worker in self._workers:
+            worker.cancel()
+
+
+@dataclass
+class PathTree:
+    """Shortest Path Tree Data Class
+    Result of a single source Dijkstra run: distance to and predecessor of
+    every reachable destination.
+    """
+    source: str
+    dist: dict[str, float]
+    pred: dict[str, str]
+
+    def path_to(self, to: str) -> list[str]:
+        path = [to]
+        while path[-1] != self.source:
+            path.append(self.pred[path[-1]])
+        path.reverse()
+        return path
+
+
+class RouteGraph:
+    """Route Graph class
+    Weighted graph built from DeliveryRoute objects. Routes can be open to
+    all transport types or to a single one. Shortest path trees are cached
+    per (source, transport type) in an LRU cache. When a route changes,
+    only the cached trees the change can affect are dropped.
+    """
+
+    def __init__(self, cache_size: int = 128) -> None:
+        self.cache_size = cache_size
+        # transport name (None for all transports) -> fr -> to -> distance
+        self._layers: dict[str | None, dict[str, dict[str, float]]] = {None: {}}
+        self._cache: OrderedDict[tuple[str, str | None], PathTree] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _mode(transport: type[Transport] | None) -> str | None:
+        return transport.__name__ if transport else None
+
+    def _neighbours(self, node: str, mode: str | None) -> dict[str, float]:
+        shared = self._layers[None].get(node, {})
+        if mode is None or mode not in self._layers:
+            return shared
+        own = self._layers[mode].get(node, {})
+        if not own:
+            return shared
+        merged = dict(shared)
+        for to, distance in own.items():
+            if distance < merged.get(to, float('inf')):
+                merged[to] = distance
+        return merged
+
+    def _dijkstra(self, source: str, mode: str | None) -> PathTree:
+        dist = {source: 0.0}
+        pred: dict[str, str] = {}
+        heap = [(0.0, source)]
+        done = set()
+        while heap:
+            d, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            for to, distance in self._neighbours(node, mode).items():
+                nd = d + distance
+                if nd < dist.get(to, float('inf')):
+                    dist[to] = nd
+                    pred[to] = node
+                    heapq.heappush(heap, (nd, to))
+        return PathTree(source, dist, pred)
+
+    def _tree(self, source: str, mode: str | None) -> PathTree:
+        key = (source, mode)
+        tree = self._cache.get(key)
+        if tree is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return tree
+        self.misses += 1
+        tree = self._cache[key] = self._dijkstra(source, mode)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return tree
+
+    def _invalidate(self, fr: str, to: str, old: float, new: float,
+                    mode: str | None) -> None:
+        """Drop cached trees that an edge change from old to new can affect
+        A longer (or removed) edge only matters to trees that use it, a
+        shorter (or added) edge only to trees it would improve.
+        """
+        inf = float('inf')
+        stale = []
+        for key, tree in self._cache.items():
+            if mode is not None and key[1] != mode:
+                continue
+            if new > old:
+                affected = tree.pred.get(to) == fr
+            else:
+                affected = tree.dist.get(fr, inf) + new < tree.dist.get(to, inf)
+            if affected:
+                stale.append(key)
+        for key in stale:
+            del self._cache[key]
+        self.invalidations += len(stale)
+
+    def _set_edge(self, fr: str, to: str, distance: float, mode: str | None) -> None:
+        layer = self._layers.setdefault(mode, {})
+        edges = layer.setdefault(fr, {})
+        old = edges.get(to, float('inf'))
+        if distance == float('inf'):
+            edges.pop(to, None)
+        else:
+            edges[to] = distance
+        if old != distance:
+            self._invalidate(fr, to, old, distance, mode)
+
+    def add_route(self,
+                  route: DeliveryRoute,
+                  transport: type[Transport] | None = None,
+                  bidirectional: bool = True) -> None:
+        """Add route, open to transport type only if specified"""
+        self.set_distance(route.fr, route.to, route.distance, transport, bidirectional)
+
+    def set_distance(self,
+                     fr: str,
+                     to: str,
+                     distance: float,
+                     transport: type[Transport] | None = None,
+                     bidirectional: bool = True) -> None:
+        """Add or update route distance"""
+        if distance < 0:
+            raise ValueError('Route distance cannot be negative')
+        mode = self._mode(transport)
+        self._set_edge(fr, to, distance, mode)
+        if bidirectional:
+            self._set_edge(to, fr, distance, mode)
+
+    def remove_route(self,
+                     fr: str,
+                     to: str,
+                     transport: type[Transport] | None = None,
+                     bidirectional: bool = True) -> None:
+        mode = self._mode(transport)
+        self._set_edge(fr, to, float('inf'), mode)
+        if bidirectional:
+            self._set_edge(to, fr, float('inf'), mode)
+
+    def shortest_path(self,
+                      fr: str,
+                      to: str,
+                      transport: type[Transport] | None = None) -> tuple[list[str], float]:
+        """Shortest path from fr to to and its distance for transport type"""
+        tree = self._tree(fr, self._mode(transport))
+        if to not in tree.dist:
+            raise ValueError(f'No route from {fr} to {to}')
+        return tree.path_to(to), tree.dist[to]
+
+    def plan(self, transport: Transport) -> tuple[list[str], float]:
+        """Shortest path for the route of a transport"""
+        return self.shortest_path(transport.fr, transport.to, type(transport))
 
 
 class Factory:
     """Transport factory class"""
 
+    @staticmethod
+    def constructor(kind: str, **kwargs) -> Callable[[DeliveryRoute], Transport]:
+        """Transport constructor for kind, with keyword arguments pre-bound"""
+        try:
+            cls = Transport.registry[kind.lower()]
+        except KeyError:
+            raise ValueError(f'No transport of kind {kind}') from None
+        return partial(cls, **kwargs) if kwargs else cls
+
+    @staticmethod
+    def create(kind: str, *args, **kwargs) -> Transport:
+        return Factory.constructor(kind)(*args, **kwargs)
+
+    @staticmethod
+    def create_many(kind: str, routes: Iterable[DeliveryRoute], **kwargs) -> list[Transport]:
+        """Create one transport of kind for every route
+        The constructor is resolved once for the whole batch.
+        """
+        return list(map(Factory.constructor(kind, **kwargs), routes))
+
     @staticmethod
     def createDeliveryRoute(*args, **kwargs) -> DeliveryRoute:
         return DeliveryRoute(*args, **kwargs)
 
+    @staticmethod
+    def createRouteGraph(*args, **kwargs) -> RouteGraph:
+        return RouteGraph(*args, **kwargs)
+
     @staticmethod
     def createTruck(*args, **kwargs) -> Truck:
         return Truck(*args, **kwargs)
@@ -113,5 +479,9 @@ class Factory:
         return Ship(*args, **kwargs)
 
     @staticmethod
-    def createLogistics() -> Logistics:
-        return Logistics()
+    def createLogistics(*args, **kwargs) -> Logistics:
+        return Logistics(*args, **kwargs)
+
+    @staticmethod
+    def createAsyncLogistics(*args, **kwargs) -> AsyncLogistics:
+        return AsyncLogistics(*args, **kwargs)
@@ -1,12 +1,26 @@
-import copy
+import mmap
+import struct
 from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left
+from itertools import compress
+from math import floor, hypot
 from math import pi as PI
-from typing import Dict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable
+
+try:
+    import numpy as np  # type: ignore[import]
+except ImportError:
+    np = None
 
 
 class Shape(ABC):
     """Abstract Shape Class"""
 
+    # Numeric attributes specific to the shape kind
+    dimensions: tuple[str, ...] = ()
+
     def __init__(self, x: int = 0, y: int = 0, color: str = "black", name: str = "shape"):
         self.x = x
         self.y = y
@@ -17,16 +31,27 @@ class Shape(ABC):
     def get_area(self):
         ...
 
+    # Area from dimensions, works on numbers and NumPy arrays alike. Kinds
+    # without it are measured shape by shape with get_area in ShapeBatch.
+    area_of: Callable[..., Any] | None = None
+
     def set_id(self, sid: int) -> None:
         self.id = sid
 
-    def clone(self) -> object:
-        return copy.copy(self)
+    def clone(self) -> 'Shape':
+        """Shallow copy that skips the generic copy.copy() protocol
+        Subclasses that keep state outside of __dict__ should override this.
+        """
+        shape = object.__new__(type(self))
+        shape.__dict__ = self.__dict__.copy()
+        return shape
 
 
 class Rectangle(Shape):
     """Rectangle Shape"""
 
+    dimensions = ('width', 'height')
+
     def __init__(self, width: int = 0, height: int = 0, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.width = width
@@ -35,10 +60,16 @@ class Rectangle(Shape):
     def get_area(self) -> int:
         return self.width * self.height
 
+    @staticmethod
+    def area_of(width, height):
+        return width * height
+
 
 class Circle(Shape):
     """Circle Shape"""
 
+    dimensions = ('radius',)
+
     def __init__(self, radius: int = 0, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.radius = radius
@@ -46,16 +77,420 @@ class Circle(Shape):
     def get_area(self) -> float:
         return PI * (self.radius ** 2)
 
+    @staticmethod
+    def area_of(radius):
+        return PI * (radius ** 2)
+
+
+class ShapeBatch:
+    """Shape Batch class
+    Columnar storage for many shapes, grouped by shape kind. Coordinates
+    and dimensions are kept in array('d') columns and areas are computed a
+    column at a time, with NumPy when it is installed. Numeric attributes
+    come back as floats when shapes are rebuilt from the batch.
+    """
+
+    def __init__(self) -> None:
+        self.columns: dict[type[Shape], dict[str, array]] = {}
+        self.labels: dict[type[Shape], dict[str, list[str]]] = {}
+        # Shape ids, None for shapes without one
+        self.ids: dict[type[Shape], list[int | None]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(columns['x']) for columns in self.columns.values())
+
+    @property
+    def kinds(self) -> list[type[Shape]]:
+        return list(self.columns)
+
+    @classmethod
+    def from_shapes(cls, shapes: Iterable[Shape]) -> 'ShapeBatch':
+        batch = cls()
+        batch.extend(shapes)
+        return batch
+
+    def _kind(self, kind: type[Shape]) -> tuple[dict[str, array], dict[str, list[str]]]:
+        if kind not in self.columns:
+            self.columns[kind] = {name: array('d') for name in ('x', 'y') + kind.dimensions}
+            self.labels[kind] = {'color': [], 'name': []}
+            self.ids[kind] = []
+        return self.columns[kind], self.labels[kind]
+
+    def append(self, shape: Shape) -> None:
+        columns, labels = self._kind(type(shape))
+        for name, column in columns.items():
+            column.append(getattr(shape, name))
+        for name, values in labels.items():
+            values.append(getattr(shape, name))
+        self.ids[type(shape)].append(getattr(shape, 'id', None))
+
+    def extend(self, shapes: Iterable[Shape]) -> None:
+        for shape in shapes:
+            self.append(shape)
+
+    def _shapes(self, kind: type[Shape]) -> Iterable[Shape]:
+        columns, labels = self.columns[kind], self.labels[kind]
+        names = list(columns) + list(labels)
+        rows = zip(*columns.values(), *labels.values())
+        for row, sid in zip(rows, self.ids[kind]):
+            shape = object.__new__(kind)
+            shape.__dict__ = dict(zip(names, row))
+            if sid is not None:
+                shape.id = sid
+            yield shape
+
+    def to_shapes(self) -> list[Shape]:
+        """Rebuild shapes, grouped by kind in insertion order"""
+        shapes: list[Shape] = []
+        for kind in self.columns:
+            shapes.extend(self._shapes(kind))
+        return shapes
+
+    def areas(self, kind: type[Shape]) -> Any:
+        """Areas of all shapes of kind
+        Returns a NumPy array if NumPy is installed, array('d') otherwise.
+        Kinds without area_of are rebuilt and measured one shape at a time.
+        """
+        area_of = kind.area_of
+        if area_of is None:
+            areas = array('d', [shape.get_area() for shape in self._shapes(kind)])
+            return np.frombuffer(areas) if np is not None else areas
+        columns = self.columns[kind]
+        dimensions = [columns[name] for name in kind.dimensions]
+        if np is not None:
+            return area_of(*(np.frombuffer(column) for column in dimensions))
+        return array('d', map(area_of, *dimensions))
+
+    def total_area(self) -> float:
+        if np is not None:
+            return float(sum(self.areas(kind).sum() for kind in self.columns))
+        return sum(sum(self.areas(kind)) for kind in self.columns)
+
+    def filter(self, min_area: float) -> 'ShapeBatch':
+        """New batch of shapes with area greater than min_area"""
+        batch = ShapeBatch()
+        for kind, columns in self.columns.items():
+            areas = self.areas(kind)
+            mask: Any
+            if np is not None:
+                mask = areas > min_area
+                batch.columns[kind] = {name: array('d', np.frombuffer(column)[mask].tobytes())
+                                       for name, column in columns.items()}
+            else:
+                mask = [area > min_area for area in areas]
+                batch.columns[kind] = {name: array('d', compress(column, mask))
+                                       for name, column in columns.items()}
+            batch.labels[kind] = {name: list(compress(values, mask))
+                                  for name, values in self.labels[kind].items()}
+            batch.ids[kind] = list(compress(self.ids[kind], mask))
+        return batch
+
+
+class ShapeGrid:
+    """Shape Grid class
+    Uniform grid spatial index over shape positions. Each shape is kept in
+    the square cell of cell_size that contains its (x, y), so queries only
+    visit cells overlapping the searched area and moving a shape touches at
+    most two cells.
+    """
+
+    def __init__(self, cell_size: float = 64) -> None:
+        if cell_size <= 0:
+            raise ValueError('Cell size must be positive')
+        self.cell_size = cell_size
+        self.cells: dict[tuple[int, int], set[Shape]] = {}
+        # id of shape -> cell it is stored in
+        self._cell_of: dict[int, tuple[int, int]] = {}
+        # Occupied cell bounds, only ever grow so they stay valid on removal
+        self._bounds: list[int] | None = None
+
+    def __len__(self) -> int:
+        return len(self._cell_of)
+
+    def __contains__(self, shape: Shape) -> bool:
+        return id(shape) in self._cell_of
+
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        return floor(x / self.cell_size), floor(y / self.cell_size)
+
+    def _add(self, shape: Shape, cell: tuple[int, int]) -> None:
+        self.cells.setdefault(cell, set()).add(shape)
+        self._cell_of[id(shape)] = cell
+        bounds = self._bounds
+        if bounds is None:
+            self._bounds = [cell[0], cell[1], cell[0], cell[1]]
+            return
+        if cell[0] < bounds[0]:
+            bounds[0] = cell[0]
+        elif cell[0] > bounds[2]:
+            bounds[2] = cell[0]
+        if cell[1] < bounds[1]:
+            bounds[1] = cell[1]
+        elif cell[1] > bounds[3]:
+            bounds[3] = cell[1]
+
+    def insert(self, shape: Shape) -> None:
+        if id(shape) in self._cell_of:
+            raise ValueError(f'{shape.name} is already indexed')
+        self._add(shape, self._cell(shape.x, shape.y))
+
+    def extend(self, shapes: Iterable[Shape]) -> None:
+        for shape in shapes:
+            self.insert(shape)
+
+    def remove(self, shape: Shape) -> None:
+        cell = self._cell_of.pop(id(shape), None)
+        if cell is None:
+            raise KeyError(f'{shape.name} is not indexed')
+        members = self.cells[cell]
+        members.discard(shape)
+        if not members:
+            del self.cells[cell]
+
+    def update(self, shape: Shape) -> None:
+        """Re-index shape after its position changed"""
+        old = self._cell_of.get(id(shape))
+        if old is None:
+            raise KeyError(f'{shape.name} is not indexed')
+        new = self._cell(shape.x, shape.y)
+        if new != old:
+            self.remove(shape)
+            self._add(shape, new)
+
+    def move(self, shape: Shape, x: int, y: int) -> None:
+        shape.x, shape.y = x, y
+        self.update(shape)
+
+    def query(self, x0: float, y0: float, x1: float, y1: float) -> list[Shape]:
+        """Shapes with position inside the rectangle (x0, y0) - (x1, y1)"""
+        (cx0, cy0), (cx1, cy1) = self._cell(x0, y0), self._cell(x1, y1)
+        found = []
+        cells = self.cells
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(cells):
+            # Area covers more cells than are occupied
+            keys = [c for c in cells if cx0 <= c[0] <= cx1 and cy0 <= c[1] <= cy1]
+        else:
+            keys = [(cx, cy) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)]
+        for key in keys:
+            for shape in cells.get(key, ()):
+                if x0 <= shape.x <= x1 and y0 <= shape.y <= y1:
+                    found.append(shape)
+        return found
+
+    def within(self, x: float, y: float, radius: float) -> list[Shape]:
+        """Shapes with position at most radius away from (x, y)"""
+        return [shape for shape in self.query(x - radius, y - radius, x + radius, y + radius)
+                if hypot(shape.x - x, shape.y - y) <= radius]
+
+    def nearest(self, x: float, y: float) -> Shape | None:
+        """Shape closest to (x, y), None if the grid is empty
+        Searches rings of cells around the cell of (x, y) until no closer
+        shape can be in a farther ring. Once the rings would visit more
+        cells than are occupied, the occupied cells left are scanned instead.
+        """
+        if not self.cells or self._bounds is None:
+            return None
+        cells, size = self.cells, self.cell_size
+        cx, cy = self._cell(x, y)
+        x0, y0, x1, y1 = self._bounds
+        limit = max(abs(cx - x0), abs(cx - x1), abs(cy - y0), abs(cy - y1))
+        best, best_dist = None, float('inf')
+        visited = 0
+        for ring in range(limit + 1):
+            # Cells of this ring can be as close as ring - 1 cells away
+            if best_dist <= (ring - 1) * size:
+                break
+            scan = visited + 8 * ring > len(cells)
+            if scan:
+                # Rings left cover more cells than are occupied
+                keys: Iterable[tuple[int, int]] = [
+                    key for key in cells if max(abs(key[0] - cx), abs(key[1] - cy)) >= ring]
+            else:
+                keys = self._ring(cx, cy, ring)
+                visited += 8 * ring or 1
+            for key in keys:
+                for shape in cells.get(key, ()):
+                    dist = hypot(shape.x - x, shape.y - y)
+                    if dist < best_dist:
+                        best, best_dist = shape, dist
+            if scan:
+                break
+        return best
+
+    @staticmethod
+    def _ring(cx: int, cy: int, ring: int) -> Iterable[tuple[int, int]]:
+        if not ring:
+            yield cx, cy
+            return
+        for dx in range(-ring, ring + 1):
+            yield cx + dx, cy - ring
+            yield cx + dx, cy + ring
+        for dy in range(-ring + 1, ring):
+            yield cx - ring, cy + dy
+            yield cx + ring, cy + dy
+
+
+class PrototypeSnapshot:
+    """Prototype Snapshot class
+    Binary prototype registry that is memory-mapped on open. Opening reads
+    only the header, and a shape is decoded from the mapping the first time
+    its id is looked up, so start-up cost does not depend on registry size.
+
+    Layout (little endian):
+        header   magic, version, count
+        ids      count sorted int64 shape ids
+        offsets  count uint64 record offsets
+        records  kind, int/float mask, x, y, dimensions, color, name
+    Only x, y, color, name and the kind dimensions are stored.
+    """
+
+    MAGIC = b'SHPR'
+    VERSION = 1
+    HEADER = struct.Struct('<4sHxxQ')
+    RECORD = struct.Struct('<BB')
+    kinds: tuple[type[Shape], ...] = (Rectangle, Circle)
+
+    def __init__(self, path: str | Path) -> None:
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = self.HEADER.unpack_from(self._map)
+        if magic != self.MAGIC:
+            self._map.close()
+            raise ValueError(f'{path} is not a prototype snapshot')
+        if version != self.VERSION:
+            self._map.close()
+            raise ValueError(f'Unsupported prototype snapshot version {version}')
+        self._count = count
+        view = memoryview(self._map)
+        start = self.HEADER.size
+        self._ids = view[start:start + 8 * count].cast('q')
+        self._offsets = view[start + 8 * count:start + 16 * count].cast('Q')
+        view.release()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, sid: int) -> bool:
+        return self._index(sid) is not None
+
+    def _index(self, sid: int) -> int | None:
+        index = bisect_left(self._ids, sid)
+        if index < self._count and self._ids[index] == sid:
+            return index
+        return None
+
+    def get(self, sid: int) -> Shape | None:
+        """Decode shape with id sid, None if it is not in the snapshot"""
+        index = self._index(sid)
+        if index is None:
+            return None
+        offset = self._offsets[index]
+        kind, mask = self.RECORD.unpack_from(self._map, offset)
+        cls = self.kinds[kind]
+        names = ('x', 'y') + cls.dimensions
+        offset += self.RECORD.size
+        state = {}
+        for bit, name in enumerate(names):
+            fmt = '<d' if mask & (1 << bit) else '<q'
+            state[name] = struct.unpack_from(fmt, self._map, offset)[0]
+            offset += 8
+        for name in ('color', 'name'):
+            size, = struct.unpack_from('<H', self._map, offset)
+            offset += 2
+            state[name] = self._map[offset:offset + size].decode()
+            offset += size
+        state['id'] = sid
+        shape = object.__new__(cls)
+        shape.__dict__ = state
+        return shape
+
+    def close(self) -> None:
+        self._ids.release()
+        self._offsets.release()
+        self._map.close()
+
+    @classmethod
+    def _encode(cls, shape: Shape) -> bytes:
+        names = ('x', 'y') + shape.dimensions
+        values = [getattr(shape, name) for name in names]
+        mask = sum(1 << bit for bit, value in enumerate(values) if isinstance(value, float))
+        fmt = ''.join('d' if isinstance(value, float) else 'q' for value in values)
+        record = cls.RECORD.pack(cls.kinds.index(type(shape)), mask)
+        record += struct.pack(f'<{fmt}', *values)
+        for text in (shape.color, shape.name):
+            data = text.encode()
+            record += struct.pack('<H', len(data)) + data
+        return record
+
+    @classmethod
+    def write(cls, path: str | Path, shapes: Dict[int, Shape]) -> None:
+        """Write shapes to a snapshot file at path"""
+        ids = sorted(shapes)
+        records = [cls._encode(shapes[sid]) for sid in ids]
+        offset = cls.HEADER.size + 16 * len(ids)
+        offsets = []
+        for record in records:
+            offsets.append(offset)
+            offset += len(record)
+        with open(path, 'wb') as file:
+            file.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, len(ids)))
+            file.write(struct.pack(f'<{len(ids)}q', *ids))
+            file.write(struct.pack(f'<{len(ids)}Q', *offsets))
+            file.writelines(records)
+
 
 class Prototype:
     """Prototype class"""
 
     cache: Dict[int, Shape] = {}
+    snapshot: PrototypeSnapshot | None = None
+
+    @staticmethod
+    def get_prototype(sid: int) -> Shape:
+        shape = Prototype.cache.get(sid, None)
+        if shape is None and Prototype.snapshot is not None:
+            # Materialize from the snapshot on first use
+            shape = Prototype.snapshot.get(sid)
+            if shape is not None:
+                Prototype.cache[sid] = shape
+        if shape is None:
+            raise KeyError(f'No prototype with id {sid}')
+        return shape
+
+    @staticmethod
+    def get_shape(sid: int) -> Shape:
+        return Prototype.get_prototype(sid).clone()
+
+    @staticmethod
+    def spawn(sid: int, n: int, **overrides) -> list[Shape]:
+        """Clone prototype n times with overridden attributes
+        The clone state is prepared once and copied for every shape.
+        """
+        shape = Prototype.get_prototype(sid)
+        for name in overrides:
+            if name not in shape.__dict__:
+                raise AttributeError(f'{type(shape).__name__} has no attribute {name}')
+        state = {**shape.__dict__, **overrides}
+        cls, new = type(shape), object.__new__
+        shapes: list[Shape] = []
+        append = shapes.append
+        for _ in range(n):
+            clone = new(cls)
+            clone.__dict__ = state.copy()
+            append(clone)
+        return shapes
+
+    @staticmethod
+    def save(path: str | Path) -> None:
+        """Snapshot the prototype cache to a binary file"""
+        PrototypeSnapshot.write(path, Prototype.cache)
 
     @staticmethod
-    def get_shape(sid):
-        SHAPE = Prototype.cache.get(sid, None)
-        return SHAPE.clone()
+    def open(path: str | Path) -> None:
+        """Memory-map a snapshot, prototypes are loaded on first use"""
+        if Prototype.snapshot is not None:
+            Prototype.snapshot.close()
+        Prototype.snapshot = PrototypeSnapshot(path)
 
     @staticmethod
     def load():
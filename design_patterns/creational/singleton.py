@@ -1,9 +1,336 @@
+import asyncio
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from time import monotonic, perf_counter
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+from design_patterns.events import bus
+
+
+@dataclass
+class PoolStats:
+    """Connection Pool Stats Data Class"""
+    size: int
+    created: int = 0
+    in_use: int = 0
+    checkouts: int = 0
+    waits: int = 0
+    timeouts: int = 0
+    wait_time: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def idle(self) -> int:
+        return self.created - self.in_use
+
+
+def _remove_database(directory: str, pid: int) -> None:
+    # A forked child inherits the pool, but must not delete the parent's file
+    if os.getpid() == pid:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class ConnectionPool:
+    """Connection Pool class
+    Bounded pool of sqlite3 connections. Connections are opened on demand
+    up to size, after which checkouts wait for a connection to be returned.
+    Without a database, the pool uses a temporary database file that is
+    removed when the pool is closed. Databases are opened in WAL mode, and
+    writers wait up to busy_timeout seconds for each other.
+    """
+
+    def __init__(self,
+                 database: str | None = None,
+                 size: int = 5,
+                 statement_cache_size: int = 128,
+                 busy_timeout: float = 5.0) -> None:
+        if size < 1:
+            raise ValueError('Pool size must be at least 1')
+        self._cleanup: weakref.finalize | None = None
+        if database is None:
+            directory = tempfile.mkdtemp(prefix='design_patterns-')
+            database = os.path.join(directory, 'design_patterns.db')
+            self._cleanup = weakref.finalize(self, _remove_database, directory, os.getpid())
+        self.database = database
+        self.size = size
+        self.statement_cache_size = statement_cache_size
+        self.busy_timeout = busy_timeout
+        self._idle: list[sqlite3.Connection] = []
+        self._cond = threading.Condition()
+        self._stats = PoolStats(size)
+        self._closed = False
+
+    @property
+    def stats(self) -> PoolStats:
+        with self._cond:
+            return PoolStats(**vars(self._stats))
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 keeps prepared statements per connection, keyed by SQL text
+        connection = sqlite3.connect(self.database, self.busy_timeout, uri=True,
+                                     check_same_thread=False,
+                                     cached_statements=self.statement_cache_size)
+        # Readers do not block the writer, and the writer does not block readers
+        connection.execute('PRAGMA journal_mode=WAL')
+        return connection
+
+    def checkout(self, timeout: float | None = None) -> sqlite3.Connection:
+        """Take a connection from the pool, waiting up to timeout seconds"""
+        start = perf_counter()
+        stats = self._stats
+        with self._cond:
+            waited = False
+            while not self._idle and stats.created >= self.size:
+                if self._closed:
+                    break
+                waited = True
+                remaining = None if timeout is None else timeout - (perf_counter() - start)
+                if remaining is not None and remaining <= 0:
+                    stats.timeouts += 1
+                    raise TimeoutError(f'No connection available after {timeout}s')
+                self._cond.wait(remaining)
+            if self._closed:
+                raise RuntimeError('Connection pool is closed')
+            if self._idle:
+                connection = self._idle.pop()
+            else:
+                connection = self._connect()
+                stats.created += 1
+            elapsed = perf_counter() - start
+            stats.in_use += 1
+            stats.checkouts += 1
+            if waited:
+                stats.waits += 1
+                stats.wait_time += elapsed
+                stats.max_wait = max(stats.max_wait, elapsed)
+        if bus.enabled:
+            bus.emit('ConnectionPool', 'checkout', wait=elapsed)
+        return connection
+
+    def checkin(self, connection: sqlite3.Connection) -> None:
+        """Return a connection to the pool"""
+        with self._cond:
+            self._stats.in_use -= 1
+            if self._closed:
+                connection.close()
+                self._stats.created -= 1
+                if not self._stats.created and self._cleanup is not None:
+                    self._cleanup()
+                return
+            self._idle.append(connection)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: float | None = None) -> Iterator[sqlite3.Connection]:
+        connection = self.checkout(timeout)
+        try:
+            yield connection
+        finally:
+            self.checkin(connection)
+
+    def close(self) -> None:
+        """Close idle connections, checked out ones are closed on return"""
+        with self._cond:
+            self._closed = True
+            for connection in self._idle:
+                connection.close()
+            self._stats.created -= len(self._idle)
+            self._idle.clear()
+            if not self._stats.created and self._cleanup is not None:
+                self._cleanup()
+            self._cond.notify_all()
+
+
+# Table names following FROM, JOIN, INTO, UPDATE and TABLE
+TABLE_PATTERN = re.compile(
+    r'\b(?:FROM|JOIN|INTO|UPDATE|TABLE(?:\s+IF\s+(?:NOT\s+)?EXISTS)?)\s+["`\[]?(\w+)',
+    re.IGNORECASE)
+# Comma separated table lists after FROM, with optional aliases
+FROM_LIST_PATTERN = re.compile(
+    r'\bFROM\s+((?:["`\[]?\w+["`\]]?(?:\s+(?:AS\s+)?\w+)?\s*,\s*)+["`\[]?\w+)',
+    re.IGNORECASE)
+# Table of results that any write may change
+ANY_TABLE = '*'
+# Subqueries in the FROM clause hide the tables listed after them
+SUBQUERY_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s*\(', re.IGNORECASE)
+READ_PATTERN = re.compile(r'\s*(?:SELECT|WITH)\b', re.IGNORECASE)
+WRITE_PATTERN = re.compile(r'\b(?:INSERT|UPDATE|DELETE|REPLACE)\b', re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def statement_info(query: str) -> tuple[bool, frozenset[str]]:
+    """Whether query is a read and which tables it names, parsed once per SQL text
+    A statement is a read if it starts with SELECT or WITH and does not
+    write, so a WITH ... INSERT statement is a write. Tables that cannot be
+    told for sure are reported as ANY_TABLE.
+    """
+    names = TABLE_PATTERN.findall(query)
+    for table_list in FROM_LIST_PATTERN.findall(query):
+        names += (item.split()[0].strip('"`[]') for item in table_list.split(','))
+    if SUBQUERY_PATTERN.search(query):
+        names.append(ANY_TABLE)
+    read = READ_PATTERN.match(query) is not None and not WRITE_PATTERN.search(query)
+    return read, frozenset(name.lower() for name in names)
+
+
+@dataclass
+class CacheStats:
+    """Query Cache Stats Data Class"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class QueryCache:
+    """Query Cache class
+    LRU cache of read query results with a per-entry time to live. Entries
+    are indexed by the tables they read, so a write only drops the results
+    of the tables it touches. Every invalidation bumps the generation of its
+    tables, so a result read before a concurrent write is not stored after it.
+    """
+
+    def __init__(self,
+                 maxsize: int = 1024,
+                 ttl: float | None = 60.0,
+                 clock: Callable[[], float] = monotonic) -> None:
+        if maxsize < 1:
+            raise ValueError('Cache size must be at least 1')
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: OrderedDict[tuple, tuple[float, list[tuple], set[str]]] = OrderedDict()
+        self._tables: dict[str, set[tuple]] = {}
+        # Invalidation counters, per table and for the whole cache
+        self._generations: dict[str, int] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(**vars(self._stats))
+
+    @staticmethod
+    def tables(query: str) -> set[str]:
+        return set(statement_info(query)[1])
+
+    @staticmethod
+    def is_read(query: str) -> bool:
+        return statement_info(query)[0]
+
+    def generation(self, query: str) -> tuple[int, ...]:
+        """Invalidation counters of the tables query reads
+        Take it before running the query and pass it on to put().
+        """
+        tables = sorted(self.tables(query))
+        with self._lock:
+            return (self._generation, *(self._generations.get(t, 0) for t in tables))
+
+    def _drop(self, key: tuple) -> None:
+        _, _, tables = self._entries.pop(key)
+        for table in tables:
+            keys = self._tables[table]
+            keys.discard(key)
+            if not keys:
+                del self._tables[table]
+
+    def get(self, query: str, params: Sequence[Any] = ()) -> list[tuple] | None:
+        key = (query, tuple(params))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            if entry[0] < self.clock():
+                self._drop(key)
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return list(entry[1])
+
+    def put(self,
+            query: str,
+            params: Sequence[Any],
+            rows: list[tuple],
+            generation: tuple[int, ...] | None = None) -> None:
+        """Store rows of query
+        Rows are not stored if the tables read were invalidated since
+        generation was taken.
+        """
+        key = (query, tuple(params))
+        expires = self.clock() + self.ttl if self.ttl is not None else float('inf')
+        tables = self.tables(query)
+        with self._lock:
+            if generation is not None and generation != (
+                    self._generation, *(self._generations.get(t, 0) for t in sorted(tables))):
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (expires, list(rows), tables)
+            for table in tables:
+                self._tables.setdefault(table, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._drop(next(iter(self._entries)))
+                self._stats.evictions += 1
+
+    def invalidate(self, tables: set[str] | None = None) -> None:
+        """Drop results reading any of tables (all results if not set)
+        Results of reads whose tables are not known are always dropped.
+        """
+        with self._lock:
+            if tables is None:
+                self._generation += 1
+                keys = set(self._entries)
+            else:
+                tables = {t.lower() for t in tables} | {ANY_TABLE}
+                for table in tables:
+                    self._generations[table] = self._generations.get(table, 0) + 1
+                keys = set().union(*(self._tables.get(t, ()) for t in tables))
+            for key in keys:
+                self._drop(key)
+            self._stats.invalidations += len(keys)
 
 
 class DatabasePrototype:
-    """Database Prototype class"""
+    """Database Prototype class
+    Thread-safe singleton. A forked child process starts without an
+    instance, since connections cannot be shared across processes.
+    """
+
+    # Temporary database of the process if not set
+    database: str | None = None
+    pool_size = 5
+    statement_cache_size = 128
 
     _instance = None
+    _lock = threading.Lock()
+
+    pool: ConnectionPool
+    cache: QueryCache | None
+    executor: ThreadPoolExecutor
 
     def __init__(self):
         raise RuntimeError('Call instance() instead')
@@ -11,11 +338,86 @@ class DatabasePrototype:
     @classmethod
     def instance(cls):
         if cls._instance is None:
-            print('Creating new instance')
-            cls._instance = cls.__new__(cls)
+            with cls._lock:
+                # Checked again, another thread may have created it meanwhile
+                if cls._instance is None:
+                    if bus.enabled:
+                        bus.emit('DatabasePrototype', 'instance_created')
+                    instance = cls.__new__(cls)
+                    instance.pool = ConnectionPool(
+                        cls.database, cls.pool_size, cls.statement_cache_size)
+                    instance.cache = None
+                    # One thread per connection, so threads never wait on the pool
+                    instance.executor = ThreadPoolExecutor(
+                        cls.pool_size, thread_name_prefix='DatabasePrototype')
+                    cls._instance = instance
         return cls._instance
 
-    @staticmethod
-    def query(query: str) -> str:
-        print(f'Running SQL query: {query}')
-        return f'Result for {query}'
+    @classmethod
+    def _after_fork(cls) -> None:
+        cls._lock = threading.Lock()
+        cls._instance = None
+
+    def enable_cache(self, maxsize: int = 1024, ttl: float | None = 60.0) -> QueryCache:
+        """Cache results of read queries"""
+        self.cache = QueryCache(maxsize, ttl)
+        return self.cache
+
+    def disable_cache(self) -> None:
+        self.cache = None
+
+    def query(self, query: str, params: Sequence[Any] = ()) -> list[tuple]:
+        """Run query on a pooled connection and return all rows
+        With the cache enabled, read results are served from the cache and
+        writes invalidate cached results of the tables they touch.
+        """
+        if bus.enabled:
+            bus.emit('DatabasePrototype', 'query', query=query)
+        cache = self.cache
+        read = cache is not None and cache.is_read(query)
+        generation = None
+        if cache is not None and read:
+            rows = cache.get(query, params)
+            if rows is not None:
+                return rows
+            # Taken before reading, so a write racing the read is noticed
+            generation = cache.generation(query)
+        # Connection context commits on success and rolls back on error
+        with self.pool.connection() as connection, connection:
+            cursor = connection.execute(query, params)
+            rows = cursor.fetchall()
+        if cache is not None:
+            # Only statements that return rows are cached
+            if read and cursor.description is not None:
+                cache.put(query, params, rows, generation)
+            else:
+                # Drop everything if the written tables cannot be told
+                cache.invalidate(cache.tables(query) or None)
+        return rows
+
+    def query_many(self, query: str, params: Iterable[Sequence[Any]]) -> int:
+        """Run query once for every parameter set in a single transaction
+        Returns number of modified rows
+        """
+        if bus.enabled:
+            bus.emit('DatabasePrototype', 'query_many', query=query)
+        with self.pool.connection() as connection, connection:
+            rowcount = connection.executemany(query, params).rowcount
+        if self.cache is not None:
+            self.cache.invalidate(self.cache.tables(query) or None)
+        return rowcount
+
+    async def aquery(self, query: str, params: Sequence[Any] = ()) -> list[tuple]:
+        """Run query in the database thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(self.query, query, params))
+
+    async def aquery_many(self, query: str, params: Iterable[Sequence[Any]]) -> int:
+        """Run query_many in the database thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, partial(self.query_many, query, list(params)))
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=DatabasePrototype._after_fork)
@@ -0,0 +1,113 @@
+import logging
+from abc import ABC, abstractmethod
+from collections import Counter, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+
+@dataclass
+class Event:
+    """Event Data Class"""
+    source: str
+    name: str
+    data: dict[str, Any] = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        fields = ' '.join(f'{k}={v}' for k, v in self.data.items())
+        return f'[{self.source}] {self.name} {fields}'.rstrip()
+
+
+class EventSink(ABC):
+    """Abstract Event Sink class"""
+
+    @abstractmethod
+    def handle(self, event: Event) -> None:
+        ...
+
+
+class PrintSink(EventSink):
+    """Prints events to stdout"""
+
+    def handle(self, event: Event) -> None:
+        print(event)
+
+
+class RingBufferSink(EventSink):
+    """Keeps the last maxlen events in memory"""
+
+    def __init__(self, maxlen: int = 1024) -> None:
+        self.buffer: deque[Event] = deque(maxlen=maxlen)
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def handle(self, event: Event) -> None:
+        self.buffer.append(event)
+
+    @property
+    def events(self) -> list[Event]:
+        return list(self.buffer)
+
+
+class LoggingSink(EventSink):
+    """Forwards events to a logger"""
+
+    def __init__(self,
+                 logger: logging.Logger | None = None,
+                 level: int = logging.INFO) -> None:
+        self.logger = logger if logger else logging.getLogger('design_patterns')
+        self.level = level
+
+    def handle(self, event: Event) -> None:
+        # Event is only formatted if the logger accepts the level
+        self.logger.log(self.level, '%s', event)
+
+
+class CounterSink(EventSink):
+    """Counts events by (source, name)"""
+
+    def __init__(self) -> None:
+        self.counts: Counter[tuple[str, str]] = Counter()
+
+    def __getitem__(self, key: tuple[str, str]) -> int:
+        return self.counts[key]
+
+    def handle(self, event: Event) -> None:
+        self.counts[event.source, event.name] += 1
+
+
+class EventBus:
+    """Event Bus class
+    Call sites check `enabled` before building an event, so emitting costs a
+    single attribute lookup while no sink is attached.
+    """
+
+    def __init__(self) -> None:
+        self.sinks: tuple[EventSink, ...] = ()
+        self.enabled = False
+
+    def attach(self, sink: EventSink) -> None:
+        self.sinks = self.sinks + (sink,)
+        self.enabled = True
+
+    def detach(self, sink: EventSink) -> None:
+        self.sinks = tuple(s for s in self.sinks if s is not sink)
+        self.enabled = bool(self.sinks)
+
+    @contextmanager
+    def attached(self, sink: EventSink) -> Iterator[EventSink]:
+        """Attach sink for the duration of a with block"""
+        self.attach(sink)
+        try:
+            yield sink
+        finally:
+            self.detach(sink)
+
+    def emit(self, source: str, name: str, **data: Any) -> None:
+        event = Event(source, name, data)
+        for sink in self.sinks:
+            sink.handle(event)
+
+
+bus = EventBus()
@@ -1,13 +1,52 @@
+import hashlib
 import json
+import os
+import struct
+import threading
 import xml.etree.ElementTree as ET
+import zlib
 from abc import ABC, abstractmethod
-from dataclasses import asdict, dataclass
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, fields
 from datetime import datetime
-from typing import Type
-from xml.dom import minidom
+from functools import lru_cache
+from itertools import islice
+from operator import attrgetter
+from pathlib import Path
+from time import perf_counter
+from typing import IO, Any, Callable, Generic, Iterable, Iterator, Type, TypeVar
+from xml.sax.saxutils import escape
 
 DATE_FORMAT = '%d/%m/%Y, %H:%M'
 ENCODING_TYPE = 'unicode'
+# Character references for line breaks, so every XML record fits on one line
+LINE_BREAKS = {'\n': '&#10;', '\r': '&#13;'}
+
+# Binary records: codec version and field count, a tag of every field name,
+# the byte length of every field, then the UTF-8 field values back to back.
+# Batches are prefixed with their record count.
+BINARY_VERSION = 2
+RECORD_HEADER = struct.Struct('<BH')
+BATCH_HEADER = struct.Struct('<I')
+
+
+@lru_cache(maxsize=64)
+def field_tags(count: int) -> struct.Struct:
+    """Struct of the field name tags of a record with count fields"""
+    return struct.Struct(f'<{count}H')
+
+
+@lru_cache(maxsize=64)
+def field_lengths(count: int) -> struct.Struct:
+    """Struct of the field lengths of a record with count fields"""
+    return struct.Struct(f'<{count}I')
+
+
+def field_tag(name: str) -> int:
+    """16 bit tag of a field name, stored in binary records"""
+    return zlib.crc32(name.encode()) & 0xFFFF
 
 
 @dataclass
@@ -33,19 +72,123 @@ class NewsArticle(MediaClass):
         return f'News Article "{self.title}" ({self.published})'
 
 
-class MediaParser(ABC):
+class MediaSchema:
+    """Media Schema class
+    Field layout of a MediaClass, introspected once per class. Provides
+    parse and serialize functions specialized for the class, so parsers do
+    not rebuild instances or deep-copy them through asdict() on every call.
+    """
+
+    _registry: dict[Type[MediaClass], 'MediaSchema'] = {}
+
+    def __init__(self, cls_type: Type[MediaClass]) -> None:
+        self.cls_type = cls_type
+        self.names = tuple(f.name for f in fields(cls_type))
+        self.lookup = {name: name for name in self.names}
+        getter = attrgetter(*self.names)
+        self.values = getter if len(self.names) > 1 else lambda obj: (getter(obj),)
+        self.tags = tuple(map(field_tag, self.names))
+        self.header = b''.join((RECORD_HEADER.pack(BINARY_VERSION, len(self.names)),
+                                field_tags(len(self.names)).pack(*self.tags)))
+        self.lengths = field_lengths(len(self.names))
+        self._templates: dict[str, str] = {}
+
+    @classmethod
+    def of(cls, cls_type: Type[MediaClass]) -> 'MediaSchema':
+        schema = cls._registry.get(cls_type)
+        if schema is None:
+            schema = cls._registry[cls_type] = cls(cls_type)
+        return schema
+
+    def to_dict(self, obj: MediaClass) -> dict[str, Any]:
+        return dict(zip(self.names, self.values(obj)))
+
+    def from_element(self,
+                     element: ET.Element,
+                     lookup: dict[str, str] | None = None) -> MediaClass:
+        """Build object from the child elements of element"""
+        lookup = lookup if lookup else self.lookup
+        keys = {}
+        for child in element:
+            tag = child.tag
+            key = lookup.get(tag[tag.index('}') + 1:] if tag[0] == '{' else tag)
+            if key is not None and child.text is not None:
+                keys[key] = child.text
+        return self.cls_type(**keys)
+
+    def template(self, root: str | None = None) -> str:
+        """XML format string with one placeholder per field"""
+        root = root if root else self.cls_type.__name__
+        template = self._templates.get(root)
+        if template is None:
+            body = ''.join(f'<{name}>{{}}</{name}>' for name in self.names)
+            template = self._templates[root] = f'<{root}>{body}</{root}>'
+        return template
+
+    def to_xml(self, obj: MediaClass, root: str | None = None) -> str:
+        """Single line XML record of obj, line breaks in values are escaped"""
+        return self.template(root).format(*(escape(value, LINE_BREAKS)
+                                            for value in self.values(obj)))
+
+    def pack(self, obj: MediaClass, parts: list[bytes] | None = None) -> list[bytes]:
+        """Binary record of obj, appended to parts to be joined by the caller"""
+        parts = [] if parts is None else parts
+        data = [value.encode() for value in self.values(obj)]
+        parts.append(self.header)
+        parts.append(self.lengths.pack(*map(len, data)))
+        parts += data
+        return parts
+
+    def unpack_from(self, buffer: memoryview, offset: int = 0) -> tuple[MediaClass, int]:
+        """Object of the binary record at offset and the offset past it
+        Fields are decoded straight from the buffer without copying it.
+        Fields missing from records of an older class layout keep their
+        defaults, extra fields of a newer layout are skipped. Fields are
+        matched by position, and records whose field name tags differ from
+        the class, as after renaming or reordering fields, are rejected.
+        """
+        try:
+            version, count = RECORD_HEADER.unpack_from(buffer, offset)
+            offset += RECORD_HEADER.size
+            if version != BINARY_VERSION:
+                raise ValueError(f'Unsupported binary media version {version}')
+            tags = field_tags(count).unpack_from(buffer, offset)
+            offset += 2 * count
+            lengths = field_lengths(count).unpack_from(buffer, offset)
+        except struct.error as error:
+            raise ValueError(f'Truncated binary media record: {error}') from None
+        known = min(count, len(self.tags))
+        if tags[:known] != self.tags[:known]:
+            raise ValueError(f'Binary media record fields do not match {self.cls_type.__name__}')
+        offset += 4 * count
+        keys = {}
+        for name, length in zip(self.names, lengths):
+            end = offset + length
+            keys[name] = str(buffer[offset:end], 'utf-8')
+            offset = end
+        offset += sum(lengths[len(self.names):])
+        if offset > len(buffer):
+            raise ValueError('Truncated binary media record')
+        return self.cls_type(**keys), offset
+
+
+# Document type of a parser, str for text formats and bytes for binary ones
+Document = TypeVar('Document', str, bytes)
+
+
+class MediaParser(ABC, Generic[Document]):
     """Abstract Media Parser Class"""
 
     @abstractmethod
-    def parse(self, cls_type: Type[MediaClass], string: str) -> MediaClass:
+    def parse(self, cls_type: Type[MediaClass], string: Document) -> MediaClass:
         ...
 
     @abstractmethod
-    def to_text(self, cls: MediaClass) -> str:
+    def to_text(self, cls: MediaClass) -> Document:
         ...
 
 
-class JSONMediaParser(MediaParser):
+class JSONMediaParser(MediaParser[str]):
     """XML Media Parser class"""
 
     @classmethod
@@ -54,10 +197,10 @@ class JSONMediaParser(MediaParser):
 
     @classmethod
     def to_text(self, cls: MediaClass) -> str:
-        return json.dumps(asdict(cls))
+        return json.dumps(MediaSchema.of(type(cls)).to_dict(cls))
 
 
-class XMLMediaParser(MediaParser):
+class XMLMediaParser(MediaParser[str]):
     """XML Media Parser class"""
 
     @classmethod
@@ -67,36 +210,319 @@ class XMLMediaParser(MediaParser):
               root: str | None = None) -> MediaClass:
 
         # Set root name to class type if root name is not specified
-        root_name = root if root else type(cls_type()).__name__
-        parsed_xml = minidom.parseString(string)
-        if len(parsed_xml.childNodes) != 1:
-            raise Exception('XML must have only one root node')
-
-        root = parsed_xml.childNodes[0]
-        node_name = getattr(root, 'nodeName', None)
-        if node_name != root_name:
+        root_name = root if root else cls_type.__name__
+        element = ET.fromstring(string)
+        if element.tag != root_name:
             raise ValueError(
-                f'XML Root "{node_name}" is not equal to media type "{root_name}"')
-
-        keys = {}
-        for key in asdict(cls_type()):
-            for node in getattr(root, 'childNodes', []):
-                if node.nodeName == key:
-                    keys[key] = node.childNodes[0].data
+                f'XML Root "{element.tag}" is not equal to media type "{root_name}"')
 
-        return cls_type(**keys)
+        return MediaSchema.of(cls_type).from_element(element)
 
     @classmethod
     def to_text(self,
                 cls: MediaClass,
                 root: str | None = None) -> str:
-        root_name = ET.Element(root) if root else ET.Element(type(cls).__name__)
-        for key in asdict(cls):
-            field = ET.SubElement(root_name, key)
-            field.text = getattr(cls, key)
-            print(key, getattr(cls, key))
-        xml = ET.tostring(root_name, encoding=ENCODING_TYPE)
-        return xml
+        return MediaSchema.of(type(cls)).to_xml(cls, root)
+
+    @classmethod
+    def dump(self,
+             objs: Iterable[MediaClass],
+             file: IO[str],
+             collection: str = 'collection') -> int:
+        """Stream objects to file as one XML document, returns record count"""
+        with XMLMediaWriter(file, collection) as writer:
+            return writer.write_many(objs)
+
+    @staticmethod
+    def _local(tag: str) -> str:
+        """Tag name without its {namespace} prefix"""
+        return tag.rpartition('}')[2]
+
+    @classmethod
+    def iterparse(self,
+                  cls_type: Type[MediaClass],
+                  source: str | IO[bytes],
+                  tag: str | None = None,
+                  aliases: dict[str, str] | None = None) -> Iterator[MediaClass]:
+        """Stream media objects from an XML file path or binary stream
+        Every element named tag (class name by default) at any depth becomes
+        one object, so RSS items or Atom entries can be read from a whole
+        feed. Child elements map to fields by name, or through aliases
+        (element name to field name). Namespaces are ignored. Elements are
+        dropped once parsed, so memory does not grow with the document.
+        """
+
+        record = tag if tag else cls_type.__name__
+        schema = MediaSchema.of(cls_type)
+        lookup = schema.lookup
+        if aliases:
+            lookup = {**lookup, **{k: v for k, v in aliases.items() if v in lookup}}
+        local = self._local
+
+        stack: list[ET.Element] = []
+        for event, element in ET.iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                stack.append(element)
+                continue
+            stack.pop()
+            if local(element.tag) != record:
+                continue
+            yield schema.from_element(element, lookup)
+            element.clear()
+            if stack:
+                stack[-1].remove(element)
+
+
+class BinaryMediaParser(MediaParser[bytes]):
+    """Binary Media Parser class
+    Compact length-prefixed format for service to service hops. Records
+    carry the codec version and a tag of every field name, so fields can be
+    added to the end of a media class without breaking existing data, while
+    data written before fields were renamed or reordered is rejected.
+    """
+
+    @classmethod
+    def parse(self,
+              cls_type: Type[MediaClass],
+              string: bytes | bytearray | memoryview) -> MediaClass:
+        buffer = memoryview(string)
+        obj, end = MediaSchema.of(cls_type).unpack_from(buffer)
+        if end != len(buffer):
+            raise ValueError(f'{len(buffer) - end} trailing bytes after binary media record')
+        return obj
+
+    @classmethod
+    def to_text(self, cls: MediaClass) -> bytes:
+        return b''.join(MediaSchema.of(type(cls)).pack(cls))
+
+    @classmethod
+    def parse_many(self,
+                   cls_type: Type[MediaClass],
+                   data: bytes | bytearray | memoryview) -> list[MediaClass]:
+        """Objects of a batch written by to_text_many"""
+        buffer = memoryview(data)
+        if len(buffer) < BATCH_HEADER.size:
+            raise ValueError('Truncated binary media batch')
+        (count,) = BATCH_HEADER.unpack_from(buffer)
+        unpack_from = MediaSchema.of(cls_type).unpack_from
+        offset = BATCH_HEADER.size
+        objs = []
+        for _ in range(count):
+            obj, offset = unpack_from(buffer, offset)
+            objs.append(obj)
+        if offset != len(buffer):
+            raise ValueError(f'{len(buffer) - offset} trailing bytes after binary media batch')
+        return objs
+
+    @classmethod
+    def to_text_many(self, objs: Iterable[MediaClass]) -> bytes:
+        """Encode objects as one batch, joined into a single bytes object"""
+        parts = [b'']
+        count = 0
+        for obj in objs:
+            MediaSchema.of(type(obj)).pack(obj, parts)
+            count += 1
+        parts[0] = BATCH_HEADER.pack(count)
+        return b''.join(parts)
+
+
+@dataclass
+class ConversionStats:
+    """Bulk Conversion Stats Data Class"""
+    records: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Converted records per second"""
+        if not self.elapsed:
+            return 0.0
+        return self.records / self.elapsed
+
+
+def ndjson_records(file: IO[str]) -> Iterator[str]:
+    """Non-empty lines of a newline-delimited JSON stream"""
+    for line in file:
+        if line.strip():
+            yield line
+
+
+def xml_records(file: IO[str], root: str, block_size: int = 1 << 16) -> Iterator[str]:
+    """Records of a stream of concatenated <root>...</root> XML documents"""
+    end_tag = f'</{root}>'
+    buffer = ''
+    while block := file.read(block_size):
+        buffer += block
+        start = 0
+        while (end := buffer.find(end_tag, start)) != -1:
+            end += len(end_tag)
+            yield buffer[start:end].strip()
+            start = end
+        buffer = buffer[start:]
+    if buffer.strip():
+        raise ValueError(f'Incomplete {root} XML record at end of input')
+
+
+def _convert_chunk(convert: Callable[[Type[MediaClass], str], str],
+                   cls_type: Type[MediaClass],
+                   records: list[str]) -> list[str]:
+    # Module level so chunks can be sent to a process pool
+    return [convert(cls_type, record) for record in records]
+
+
+@dataclass
+class ConversionCacheStats:
+    """Conversion Cache Stats Data Class"""
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ConversionCache:
+    """Conversion Cache class
+    Converted documents keyed by a hash of the input document, the target
+    media class with its field layout and the output format. Keeps the most
+    recently used results in memory and, with a directory set, every result
+    on disk, where it survives the process and is shared with other
+    processes. Results are not reused once the fields of the class change.
+    """
+
+    def __init__(self,
+                 maxsize: int = 1024,
+                 directory: str | Path | None = None) -> None:
+        if maxsize < 1:
+            raise ValueError('Cache size must be at least 1')
+        self.maxsize = maxsize
+        self.directory = Path(directory) if directory is not None else None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = ConversionCacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> ConversionCacheStats:
+        with self._lock:
+            return ConversionCacheStats(**vars(self._stats))
+
+    @staticmethod
+    def key(cls_type: Type[MediaClass], target: str, document: str) -> str:
+        names = ','.join(MediaSchema.of(cls_type).names)
+        digest = hashlib.blake2b(
+            f'{cls_type.__module__}.{cls_type.__qualname__}({names}):{target}:'.encode(),
+            digest_size=20)
+        digest.update(document.encode())
+        return f'{digest.hexdigest()}.{target}'
+
+    def _put(self, key: str, result: str) -> None:
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self._stats.hits += 1
+                return result
+        if self.directory is not None:
+            try:
+                result = (self.directory / key).read_text(encoding='utf-8')
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            if result is None:
+                self._stats.misses += 1
+                return None
+            self._put(key, result)
+            self._stats.hits += 1
+            self._stats.disk_hits += 1
+            return result
+
+    def put(self, key: str, result: str) -> None:
+        with self._lock:
+            self._put(key, result)
+        if self.directory is not None:
+            # Written aside and renamed, so readers never see a partial file
+            path = self.directory / key
+            partial = path.with_name(f'{key}.{os.getpid()}.{threading.get_ident()}.tmp')
+            partial.write_text(result, encoding='utf-8')
+            os.replace(partial, path)
+
+    def clear(self) -> None:
+        """Drop the in-memory results, the disk results are kept"""
+        with self._lock:
+            self._entries.clear()
+
+
+@contextmanager
+def _open(target: str | Path | IO[str], mode: str) -> Iterator[IO[str]]:
+    if isinstance(target, (str, Path)):
+        with open(target, mode, encoding='utf-8') as file:
+            yield file
+    else:
+        with nullcontext(target) as file:
+            yield file
+
+
+class XMLMediaWriter:
+    """XML Media Writer class
+    Streams media objects to a text file-like object inside a collection
+    root element. Each record is written as soon as it is given, so the
+    document is never held in memory. Use as a context manager, or call
+    close() to write the closing root tag.
+    """
+
+    def __init__(self,
+                 file: IO[str],
+                 collection: str = 'collection',
+                 root: str | None = None,
+                 declaration: bool = True) -> None:
+        self.file = file
+        self.collection = collection
+        self.root = root
+        self.count = 0
+        self.closed = False
+        if declaration:
+            file.write('<?xml version="1.0" encoding="utf-8"?>\n')
+        file.write(f'<{collection}>\n')
+
+    def __enter__(self) -> 'XMLMediaWriter':
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def write(self, obj: MediaClass) -> None:
+        if self.closed:
+            raise ValueError('Write to a closed XML writer')
+        self.file.write(MediaSchema.of(type(obj)).to_xml(obj, self.root))
+        self.file.write('\n')
+        self.count += 1
+
+    def write_many(self, objs: Iterable[MediaClass]) -> int:
+        """Write all objects, returns number of objects written"""
+        count = self.count
+        for obj in objs:
+            self.write(obj)
+        return self.count - count
+
+    def close(self) -> None:
+        if not self.closed:
+            self.file.write(f'</{self.collection}>\n')
+            self.closed = True
 
 
 class Adapter:
@@ -104,17 +530,48 @@ class Adapter:
 
     xml_parser = XMLMediaParser()
     json_parser = JSONMediaParser()
+    binary_parser = BinaryMediaParser()
+
+    cache: ConversionCache | None = None
+
+    @classmethod
+    def enable_cache(self,
+                     maxsize: int = 1024,
+                     directory: str | Path | None = None) -> ConversionCache:
+        """Cache json_to_xml and xml_to_json results by input document hash"""
+        Adapter.cache = ConversionCache(maxsize, directory)
+        return Adapter.cache
+
+    @classmethod
+    def disable_cache(self) -> None:
+        Adapter.cache = None
 
     @classmethod
     def json_to_xml(self, cls_type: Type[MediaClass], json: str) -> str:
+        cache = self.cache
+        if cache is not None:
+            key = cache.key(cls_type, 'xml', json)
+            result = cache.get(key)
+            if result is not None:
+                return result
         parsed_obj = self.json_parser.parse(cls_type, json)
         result = self.xml_parser.to_text(parsed_obj)
+        if cache is not None:
+            cache.put(key, result)
         return result
 
     @classmethod
     def xml_to_json(self, cls_type: Type[MediaClass], xml: str) -> str:
+        cache = self.cache
+        if cache is not None:
+            key = cache.key(cls_type, 'json', xml)
+            result = cache.get(key)
+            if result is not None:
+                return result
         parsed_obj = self.xml_parser.parse(cls_type, xml)
         result = self.json_parser.to_text(parsed_obj)
+        if cache is not None:
+            cache.put(key, result)
         return result
 
     @classmethod
@@ -127,6 +584,89 @@ class Adapter:
         parsed_obj = self.json_parser.parse(cls_type, json)
         return parsed_obj
 
+    @classmethod
+    def binary_to_obj(self, cls_type: Type[MediaClass], data: bytes) -> MediaClass:
+        return self.binary_parser.parse(cls_type, data)
+
+    @classmethod
+    def json_to_binary(self, cls_type: Type[MediaClass], json: str) -> bytes:
+        return self.binary_parser.to_text(self.json_parser.parse(cls_type, json))
+
+    @classmethod
+    def binary_to_json(self, cls_type: Type[MediaClass], data: bytes) -> str:
+        return self.json_parser.to_text(self.binary_parser.parse(cls_type, data))
+
+    @classmethod
+    def xml_to_binary(self, cls_type: Type[MediaClass], xml: str) -> bytes:
+        return self.binary_parser.to_text(self.xml_parser.parse(cls_type, xml))
+
+    @classmethod
+    def binary_to_xml(self, cls_type: Type[MediaClass], data: bytes) -> str:
+        return self.xml_parser.to_text(self.binary_parser.parse(cls_type, data))
+
+    @classmethod
+    def _convert_records(self,
+                         convert: Callable[[Type[MediaClass], str], str],
+                         cls_type: Type[MediaClass],
+                         records: Iterable[str],
+                         dst: IO[str],
+                         workers: int,
+                         chunksize: int) -> ConversionStats:
+        """Convert records in chunks and write one result per line in input order
+        With several workers, chunks are converted in a process pool with
+        at most two chunks per worker in flight, which bounds memory use.
+        """
+
+        stats = ConversionStats()
+        start = perf_counter()
+        records = iter(records)
+        chunks = iter(lambda: list(islice(records, chunksize)), [])
+
+        def write(results: list[str]) -> None:
+            dst.writelines(f'{result.rstrip()}\n' for result in results)
+            stats.records += len(results)
+
+        if workers > 1:
+            with ProcessPoolExecutor(workers) as pool:
+                pending: deque[Future] = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(_convert_chunk, convert, cls_type, chunk))
+                    if len(pending) >= 2 * workers:
+                        write(pending.popleft().result())
+                while pending:
+                    write(pending.popleft().result())
+        else:
+            for chunk in chunks:
+                write(_convert_chunk(convert, cls_type, chunk))
+        stats.elapsed = perf_counter() - start
+        return stats
+
+    @classmethod
+    def ndjson_to_xml(self,
+                      cls_type: Type[MediaClass],
+                      src: str | Path | IO[str],
+                      dst: str | Path | IO[str],
+                      workers: int = 1,
+                      chunksize: int = 1000) -> ConversionStats:
+        """Convert a newline-delimited JSON file to one XML record per line"""
+        with _open(src, 'r') as src_file, _open(dst, 'w') as dst_file:
+            return self._convert_records(
+                Adapter.json_to_xml, cls_type, ndjson_records(src_file),
+                dst_file, workers, chunksize)
+
+    @classmethod
+    def xml_to_ndjson(self,
+                      cls_type: Type[MediaClass],
+                      src: str | Path | IO[str],
+                      dst: str | Path | IO[str],
+                      workers: int = 1,
+                      chunksize: int = 1000) -> ConversionStats:
+        """Convert a file of concatenated XML records to newline-delimited JSON"""
+        with _open(src, 'r') as src_file, _open(dst, 'w') as dst_file:
+            return self._convert_records(
+                Adapter.xml_to_json, cls_type, xml_records(src_file, cls_type.__name__),
+                dst_file, workers, chunksize)
+
 
 # if __name__ == '__main__':
 #     import httpx
@@ -1,5 +1,17 @@
+import asyncio
 from abc import ABC, abstractmethod, abstractproperty
-from dataclasses import asdict, dataclass
+from array import array
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field, fields
+from operator import itemgetter
+from typing import Any, Hashable, Iterable, Sequence
+
+from design_patterns.events import bus
+
+try:
+    import numpy as np  # type: ignore[import]
+except ImportError:
+    np = None
 
 
 @dataclass
@@ -9,6 +21,225 @@ class DeviceState:
     channel: int = 1
 
 
+# Field names of a device state, in declaration order
+STATE_FIELDS = tuple(f.name for f in fields(DeviceState))
+
+
+class TrackedDeviceState(DeviceState):
+    """Tracked Device State class
+    Wraps the state of a device and records the fields that change in a
+    StateJournal. Reads and writes go through to the wrapped state, which
+    can itself be a view, such as the state of a fleet device.
+    """
+
+    journal: 'StateJournal'
+    key: Hashable
+    state: DeviceState
+
+    def __init__(self, journal: 'StateJournal', key: Hashable, state: DeviceState) -> None:
+        self.journal = journal
+        self.key = key
+        self.state = state
+        # Initial values are recorded, so a new replica receives them too
+        for name in STATE_FIELDS:
+            journal.record(key, name, getattr(state, name))
+
+    def _set(self, name: str, value: Any) -> None:
+        if getattr(self.state, name) != value:
+            self.journal.record(self.key, name, value)
+        setattr(self.state, name, value)
+
+    @property
+    def volume(self) -> int:
+        return self.state.volume
+
+    @volume.setter
+    def volume(self, volume: int) -> None:
+        self._set('volume', volume)
+
+    @property
+    def enabled(self) -> bool:
+        return self.state.enabled
+
+    @enabled.setter
+    def enabled(self, enabled: bool) -> None:
+        self._set('enabled', enabled)
+
+    @property
+    def channel(self) -> int:
+        return self.state.channel
+
+    @channel.setter
+    def channel(self, channel: int) -> None:
+        self._set('channel', channel)
+
+
+@dataclass
+class StateDelta:
+    """State Delta Data Class
+    Changes of the versions after since up to version, as (version, device
+    key, field, value) tuples in version order.
+    """
+    since: int
+    version: int
+    changes: list[tuple[int, Hashable, str, Any]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.changes)
+
+
+@dataclass
+class FleetVersions:
+    """Fleet Versions Data Class
+    Version of the latest change of every fleet device field, indexed by
+    device id (0 for none), and the latest version of each field.
+    """
+    fleet: 'DeviceFleet'
+    versions: dict[str, array]
+    latest: dict[str, int]
+
+
+class StateJournal:
+    """State Journal class
+    Change journal of tracked devices. Every field change gets the next
+    version number. Only the latest change of each device field is kept,
+    in version order, so the journal never outgrows the tracked state and
+    a delta costs in proportion to the changes it holds. Tracked fleets
+    only keep an array('Q') of versions per field, values are read from
+    the fleet, and fleet devices are keyed by (fleet key, device id).
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self._entries: OrderedDict[tuple[Hashable, str], tuple[int, Any]] = OrderedDict()
+        self._fleets: dict[Hashable, FleetVersions] = {}
+
+    def __len__(self) -> int:
+        fleet_entries = sum(len(versions) for tracked in self._fleets.values()
+                            for versions in tracked.versions.values())
+        return len(self._entries) + fleet_entries
+
+    def track(self, device: 'Device', key: Hashable) -> 'Device':
+        """Record the state changes of device under key"""
+        device.state = TrackedDeviceState(self, key, device.state)
+        return device
+
+    def track_fleet(self, fleet: 'DeviceFleet', key: Hashable = 'fleet') -> 'DeviceFleet':
+        """Record the state changes of every fleet device under (key, id)
+        Covers bulk operations, device views and devices added later.
+        """
+        if fleet.journal is not None:
+            raise ValueError('Fleet is already tracked')
+        if key in self._fleets:
+            raise ValueError(f'Fleet key {key!r} is already used')
+        self._fleets[key] = FleetVersions(
+            fleet, {name: array('Q') for name in STATE_FIELDS}, dict.fromkeys(STATE_FIELDS, 0))
+        fleet.journal, fleet.journal_key = self, key
+        for name in STATE_FIELDS:
+            self.record_fleet(key, name, range(len(fleet)))
+        return fleet
+
+    def record(self, key: Hashable, name: str, value: Any) -> None:
+        self.version += 1
+        entry = (key, name)
+        self._entries[entry] = (self.version, value)
+        self._entries.move_to_end(entry)
+
+    def record_fleet(self, key: Hashable, name: str, ids: Sequence[int]) -> None:
+        """Record a change of field name of the devices with ids of fleet key"""
+        tracked = self._fleets[key]
+        versions = tracked.versions[name]
+        if len(versions) < len(tracked.fleet):
+            versions.extend(array('Q', [0]) * (len(tracked.fleet) - len(versions)))
+        count = len(ids)
+        if not count:
+            return
+        start = self.version + 1
+        self.version += count
+        selected = slice(ids.start, ids.stop) if isinstance(ids, range) else ids
+        if np is not None:
+            if not isinstance(selected, slice):
+                selected = np.asarray(selected)
+            np.frombuffer(versions, dtype=np.uint64)[selected] = np.arange(
+                start, self.version + 1, dtype=np.uint64)
+        elif isinstance(selected, slice):
+            versions[selected] = array('Q', range(start, self.version + 1))
+        else:
+            for version, index in enumerate(ids, start):
+                versions[index] = version
+        tracked.latest[name] = self.version
+
+    def _fleet_changes(self,
+                       key: Hashable,
+                       tracked: FleetVersions,
+                       name: str,
+                       since: int) -> Iterable[tuple[int, Hashable, str, Any]]:
+        fleet, versions = tracked.fleet, tracked.versions[name]
+        rows: Iterable[tuple[int, int, Any]]
+        if np is not None:
+            all_versions = np.frombuffer(versions, dtype=np.uint64)
+            indices = np.flatnonzero(all_versions > since)
+            values = np.frombuffer(getattr(fleet, name), dtype=FIELD_TYPES[name])[indices]
+            if name == 'enabled':
+                values = values.astype(bool)
+            rows = zip(all_versions[indices].tolist(), indices.tolist(), values.tolist())
+        else:
+            rows = ((version, index, fleet.get(index, name))
+                    for index, version in enumerate(versions) if version > since)
+        return ((version, (key, index), name, value) for version, index, value in rows)
+
+    def delta(self, since: int = 0) -> StateDelta:
+        """Latest changes of every device field changed after version since"""
+        changes = []
+        for (key, name), (version, value) in reversed(self._entries.items()):
+            if version <= since:
+                break
+            changes.append((version, key, name, value))
+        changes.reverse()
+        merge = False
+        for key, tracked in self._fleets.items():
+            for name, latest in tracked.latest.items():
+                # Fields without changes are not scanned
+                if latest > since:
+                    changes.extend(self._fleet_changes(key, tracked, name, since))
+                    merge = True
+        if merge:
+            changes.sort(key=itemgetter(0))
+        return StateDelta(since, self.version, changes)
+
+
+class StateReplica:
+    """State Replica class
+    Copy of the tracked device states, kept up to date with deltas
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self.states: dict[Hashable, DeviceState] = {}
+
+    def apply(self, delta: StateDelta) -> int:
+        """Apply delta, returns number of fields changed"""
+        if delta.since > self.version:
+            raise ValueError(
+                f'Delta since version {delta.since} skips changes after replica '
+                f'version {self.version}')
+        states, applied = self.states, 0
+        for version, key, name, value in delta.changes:
+            # Changes the replica already has are skipped
+            if version > self.version:
+                state = states.get(key)
+                if state is None:
+                    state = states[key] = DeviceState()
+                setattr(state, name, value)
+                applied += 1
+        self.version = max(self.version, delta.version)
+        return applied
+
+    def sync(self, journal: StateJournal) -> int:
+        """Apply the changes of journal since the replica version"""
+        return self.apply(journal.delta(self.version))
+
+
 class Device(ABC):
     """Abstract Device class"""
 
@@ -40,10 +271,8 @@ class Radio(Device):
 
     def toggle_power(self) -> None:
         self.state.enabled = not self.state.enabled
-        if self.state.enabled:
-            print('Radio enabled!')
-            return
-        print('Radio disabled!')
+        if bus.enabled:
+            bus.emit('Radio', 'power', enabled=self.state.enabled)
 
 
 class TV(Device):
@@ -51,10 +280,8 @@ class TV(Device):
 
     def toggle_power(self) -> None:
         self.state.enabled = not self.state.enabled
-        if self.state.enabled:
-            print('TV enabled!')
-            return
-        print('TV disabled!')
+        if bus.enabled:
+            bus.emit('TV', 'power', enabled=self.state.enabled)
 
 
 class BridgeRemote:
@@ -86,3 +313,393 @@ class BridgeRemote:
     def channel_down(self) -> None:
         channel = self.device.get_channel()
         self.device.set_channel(channel - 1)
+
+
+@dataclass
+class CoalescingStats:
+    """Coalescing Remote Stats Data Class
+    Button presses received, flushes sent, device calls made, device
+    calls a remote sending every press right away would have made on top
+    and flushes the device failed.
+    """
+    presses: int = 0
+    flushes: int = 0
+    device_calls: int = 0
+    merged_calls: int = 0
+    failures: int = 0
+
+
+class AsyncBridgeRemote(BridgeRemote):
+    """Async Bridge Remote class
+    Queues button presses instead of sending them to the device. Presses
+    within window seconds are merged into one net change (+30 volume, -2
+    channel, power toggled or not), sent to the device in the event loop
+    executor, so slow devices do not block the loop. Buttons must be
+    pressed from within a running event loop. If the device fails a timed
+    flush, its presses are dropped and the error is raised from the next
+    flush.
+    """
+
+    def __init__(self,
+                 device: Device,
+                 volume_increment: int = 10,
+                 window: float = 0.05) -> None:
+        super().__init__(device, volume_increment)
+        self.window = window
+        self.stats = CoalescingStats()
+        self._volume = self._channel = self._toggles = self._calls = 0
+        self._timer: asyncio.Task | None = None
+        self._sending = asyncio.Lock()
+        # Error of a timed flush, kept for the next flush to raise
+        self._error: Exception | None = None
+
+    async def __aenter__(self) -> 'AsyncBridgeRemote':
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.flush()
+
+    def _press(self, volume: int = 0, channel: int = 0, toggles: int = 0) -> None:
+        self._volume += volume
+        self._channel += channel
+        self._toggles += toggles
+        # Calls the synchronous remote would make for this press
+        self._calls += 1 if toggles else 2
+        self.stats.presses += 1
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception as error:
+            self._error = error
+
+    def _send(self, volume: int, channel: int, toggles: int) -> int:
+        calls = 0
+        if volume:
+            self.device.set_volume(self.device.get_volume() + volume)
+            calls += 2
+        if channel:
+            self.device.set_channel(self.device.get_channel() + channel)
+            calls += 2
+        if toggles % 2:
+            self.device.toggle_power()
+            calls += 1
+        return calls
+
+    async def flush(self) -> None:
+        """Send the net change of pending presses to the device now"""
+        timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        pending = self._volume, self._channel, self._toggles
+        calls = self._calls
+        self._volume = self._channel = self._toggles = self._calls = 0
+        # Flushes reach the device in press order, and even an empty flush
+        # waits for a send in flight, so the device is up to date on return
+        async with self._sending:
+            if calls:
+                loop = asyncio.get_running_loop()
+                try:
+                    sent = await loop.run_in_executor(None, self._send, *pending)
+                except Exception:
+                    self.stats.failures += 1
+                    raise
+                stats = self.stats
+                stats.flushes += 1
+                stats.device_calls += sent
+                stats.merged_calls += calls - sent
+                if bus.enabled:
+                    bus.emit('AsyncBridgeRemote', 'flush', calls=sent, merged=calls - sent)
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def toggle_power(self) -> None:
+        self._press(toggles=1)
+
+    def volume_up(self) -> None:
+        self._press(volume=self.volume_increment)
+
+    def volume_down(self) -> None:
+        self._press(volume=-self.volume_increment)
+
+    def channel_up(self) -> None:
+        self._press(channel=1)
+
+    def channel_down(self) -> None:
+        self._press(channel=-1)
+
+
+class DeviceStateView(DeviceState):
+    """Device State View class
+    DeviceState of a single fleet device, read from and written to the
+    fleet arrays, so Device methods and remotes work on fleet devices.
+    """
+
+    __slots__ = ('fleet', 'index')
+
+    def __init__(self, fleet: 'DeviceFleet', index: int) -> None:
+        self.fleet = fleet
+        self.index = index
+
+    @property
+    def volume(self) -> int:
+        return self.fleet.get(self.index, 'volume')
+
+    @volume.setter
+    def volume(self, volume: int) -> None:
+        self.fleet.set(self.index, 'volume', volume)
+
+    @property
+    def enabled(self) -> bool:
+        return self.fleet.get(self.index, 'enabled')
+
+    @enabled.setter
+    def enabled(self, enabled: bool) -> None:
+        self.fleet.set(self.index, 'enabled', bool(enabled))
+
+    @property
+    def channel(self) -> int:
+        return self.fleet.get(self.index, 'channel')
+
+    @channel.setter
+    def channel(self, channel: int) -> None:
+        self.fleet.set(self.index, 'channel', channel)
+
+
+# NumPy types of the fleet arrays
+FIELD_TYPES = {'volume': 'intc', 'channel': 'intc', 'enabled': 'int8'}
+
+
+class DeviceFleet:
+    """Device Fleet class
+    Columnar state store for many devices. Volume, channel and enabled
+    flags are kept in typed arrays indexed by device id, so remote
+    operations on a group or a device kind run over whole arrays, with
+    NumPy when it is installed. Devices can belong to several groups.
+    """
+
+    def __init__(self) -> None:
+        self.volume = array('i')
+        self.channel = array('i')
+        self.enabled = array('b')
+        self.kind = array('B')
+        self.kinds: list[type[Device]] = []
+        self.groups: dict[str, array] = {}
+        # Set by StateJournal.track_fleet
+        self.journal: StateJournal | None = None
+        self.journal_key: Hashable = None
+
+    def __len__(self) -> int:
+        return len(self.kind)
+
+    def _code(self, kind: type[Device]) -> int:
+        if kind not in self.kinds:
+            self.kinds.append(kind)
+        return self.kinds.index(kind)
+
+    def add(self, kind: type[Device], n: int = 1, group: str | None = None) -> range:
+        """Add n devices of kind in their default state, returns their ids"""
+        state, start = DeviceState(), len(self)
+        self.volume += array('i', [state.volume]) * n
+        self.channel += array('i', [state.channel]) * n
+        self.enabled += array('b', [state.enabled]) * n
+        self.kind += array('B', [self._code(kind)]) * n
+        ids = range(start, start + n)
+        if self.journal is not None:
+            for name in STATE_FIELDS:
+                self.journal.record_fleet(self.journal_key, name, ids)
+        if group is not None:
+            self.add_to_group(group, ids)
+        return ids
+
+    def get(self, index: int, name: str) -> Any:
+        """State field name of the device with id index"""
+        value = getattr(self, name)[index]
+        return bool(value) if name == 'enabled' else value
+
+    def set(self, index: int, name: str, value: Any) -> None:
+        """Set state field name of the device with id index"""
+        old = self.get(index, name)
+        getattr(self, name)[index] = value
+        if self.journal is not None and old != value:
+            self.journal.record_fleet(self.journal_key, name, [index])
+
+    def add_to_group(self, group: str, ids: Iterable[int]) -> None:
+        members = self.groups.setdefault(group, array('q'))
+        known = set(members)
+        for index in ids:
+            if not 0 <= index < len(self):
+                raise IndexError(f'No device with id {index}')
+            if index not in known:
+                known.add(index)
+                members.append(index)
+
+    def device(self, index: int) -> Device:
+        """Device view of the fleet device with id index"""
+        if not 0 <= index < len(self):
+            raise IndexError(f'No device with id {index}')
+        device = object.__new__(self.kinds[self.kind[index]])
+        device.state = DeviceStateView(self, index)
+        return device
+
+    def _select(self, group: str | None, kind: type[Device] | None) -> Any:
+        """Ids of the devices in group and of kind, None for all devices"""
+        if group is not None and group not in self.groups:
+            raise KeyError(f'Unknown device group "{group}"')
+        if group is None and kind is None:
+            return None
+        code = self.kinds.index(kind) if kind in self.kinds else -1
+        if np is not None:
+            ids = None if group is None else np.frombuffer(self.groups[group], dtype=np.int64)
+            if kind is None:
+                return ids
+            kinds = np.frombuffer(self.kind, dtype=np.uint8)
+            return np.flatnonzero(kinds == code) if ids is None else ids[kinds[ids] == code]
+        members: Sequence[int] = range(len(self)) if group is None else self.groups[group]
+        if kind is None:
+            return members
+        kinds = self.kind
+        return [index for index in members if kinds[index] == code]
+
+    def ids(self, group: str | None = None, kind: type[Device] | None = None) -> Sequence[int]:
+        """Ids of the devices in group and of kind (all devices if not set)
+        Returns a NumPy array if NumPy is installed, a sequence of ints
+        otherwise, and a range when every device is selected. The ids are
+        a copy, so they stay valid as devices and groups change.
+        """
+        ids = self._select(group, kind)
+        if ids is None:
+            return range(len(self))
+        if kind is None:
+            # Members of the group itself
+            return ids.copy() if np is not None else array('q', ids)
+        return ids
+
+    def _check_range(self, field: str, ids: Any, add: int, value: int | None) -> None:
+        """Raise OverflowError if the operation takes a value out of the field type"""
+        column = getattr(self, field)
+        bits = 8 * column.itemsize
+        low, high = -2 ** (bits - 1), 2 ** (bits - 1) - 1
+        if value is not None:
+            low_value = high_value = value
+        elif add and len(column if ids is None else ids):
+            if np is not None:
+                values = np.frombuffer(column, dtype=FIELD_TYPES[field])
+                values = values if ids is None else values[ids]
+                low_value, high_value = int(values.min()) + add, int(values.max()) + add
+            else:
+                values = column if ids is None else [column[index] for index in ids]
+                low_value, high_value = min(values) + add, max(values) + add
+        else:
+            return
+        if low_value < low or high_value > high:
+            raise OverflowError(f'Device {field} out of range [{low}, {high}]')
+
+    def _apply(self,
+               name: str,
+               field: str,
+               ids: Any,
+               add: int = 0,
+               value: int | None = None,
+               toggle: bool = False) -> int:
+        # Checked up front, so a failing operation changes no device
+        self._check_range(field, ids, add, value)
+        count = len(self) if ids is None else len(ids)
+        update = self._update_numpy if np is not None else self._update_array
+        changed = update(field, ids, add, value, toggle)
+        if self.journal is not None and changed is not None:
+            self.journal.record_fleet(self.journal_key, field, changed)
+        if bus.enabled:
+            bus.emit('DeviceFleet', name, devices=count)
+        return count
+
+    def _update_numpy(self, field: str, ids: Any, add: int, value: int | None,
+                      toggle: bool) -> Any:
+        """Update devices with NumPy, returns ids of the devices changed if tracked"""
+        values = np.frombuffer(getattr(self, field), dtype=FIELD_TYPES[field])
+        selected = slice(None) if ids is None else ids
+        before = values[selected].copy() if self.journal is not None else None
+        if toggle:
+            values[selected] ^= 1
+        elif value is not None:
+            values[selected] = value
+        else:
+            values[selected] += add
+        if before is None:
+            return None
+        changed = np.flatnonzero(before != values[selected])
+        return changed if ids is None else ids[changed]
+
+    def _update_array(self, field: str, ids: Any, add: int, value: int | None,
+                      toggle: bool) -> list[int] | None:
+        """Update devices one by one, returns ids of the devices changed if tracked"""
+        column = getattr(self, field)
+        changed: list[int] | None = [] if self.journal is not None else None
+        for index in range(len(column)) if ids is None else ids:
+            old = column[index]
+            new = old ^ 1 if toggle else old + add if value is None else value
+            if new != old:
+                column[index] = new
+                if changed is not None:
+                    changed.append(index)
+        return changed
+
+    # Group remote operations, each returns the number of devices changed
+
+    def volume_up(self,
+                  increment: int = 10,
+                  group: str | None = None,
+                  kind: type[Device] | None = None) -> int:
+        return self._apply('volume', 'volume',
+                           self._select(group, kind), add=increment)
+
+    def volume_down(self,
+                    increment: int = 10,
+                    group: str | None = None,
+                    kind: type[Device] | None = None) -> int:
+        return self._apply('volume', 'volume',
+                           self._select(group, kind), add=-increment)
+
+    def set_volume(self,
+                   volume: int,
+                   group: str | None = None,
+                   kind: type[Device] | None = None) -> int:
+        return self._apply('volume', 'volume',
+                           self._select(group, kind), value=volume)
+
+    def channel_up(self, group: str | None = None, kind: type[Device] | None = None) -> int:
+        return self._apply('channel', 'channel', self._select(group, kind), add=1)
+
+    def channel_down(self, group: str | None = None, kind: type[Device] | None = None) -> int:
+        return self._apply('channel', 'channel', self._select(group, kind), add=-1)
+
+    def set_channel(self,
+                    channel: int,
+                    group: str | None = None,
+                    kind: type[Device] | None = None) -> int:
+        return self._apply('channel', 'channel',
+                           self._select(group, kind), value=channel)
+
+    def power_on(self, group: str | None = None, kind: type[Device] | None = None) -> int:
+        return self._apply('power', 'enabled', self._select(group, kind), value=1)
+
+    def power_off(self, group: str | None = None, kind: type[Device] | None = None) -> int:
+        return self._apply('power', 'enabled', self._select(group, kind), value=0)
+
+    def toggle_power(self, group: str | None = None, kind: type[Device] | None = None) -> int:
+        return self._apply('power', 'enabled', self._select(group, kind), toggle=True)
+
+    def enabled_count(self, group: str | None = None, kind: type[Device] | None = None) -> int:
+        ids = self._select(group, kind)
+        if np is not None:
+            enabled = np.frombuffer(self.enabled, dtype=np.int8)
+            return int(enabled.sum() if ids is None else enabled[ids].sum())
+        if ids is None:
+            return sum(self.enabled)
+        enabled = self.enabled
+        return sum(enabled[index] for index in ids)
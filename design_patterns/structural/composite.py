@@ -4,6 +4,8 @@ from dataclasses import dataclass, field
 from datetime import datetime
 from itertools import count
 
+from design_patterns.events import bus
+
 DATE_FORMAT = '%d/%m/%Y, %H:%M'
 
 
@@ -65,7 +67,8 @@ class ProductPackage(AbstractPackage):
         if not self.products.get(id, None):
             raise KeyError(f'No product with id {id}')
         removed = self.products.pop(id)
-        print(removed)
+        if bus.enabled:
+            bus.emit('ProductPackage', 'removed', product=removed)
 
     @property
     def price_total(self) -> float:
@@ -97,13 +100,14 @@ class CompositeOrder(AbstractPackage):
         if not self.packages.get(id, None):
             raise KeyError(f'No package with id {id}')
         removed = self.packages.pop(id)
-        print(removed)
+        if bus.enabled:
+            bus.emit('CompositeOrder', 'removed', package=removed.id)
 
     def checkout(self) -> Check:
         price_total = sum(p.price_total for p in self.packages.values())
         weight_total = sum(p.weight_total for p in self.packages.values())
         check = Check(order_id=self.id, price=price_total, weight=weight_total)
-        print(f'Order total: ${price_total}')
-        print(f'Items: {len(self)}')
-        print(f'Date: {check.date}')
+        if bus.enabled:
+            bus.emit('CompositeOrder', 'checkout',
+                     total=price_total, items=len(self), date=check.date)
         return check
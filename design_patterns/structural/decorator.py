@@ -4,6 +4,8 @@ from builtins import str
 from pathlib import Path
 from sys import getsizeof
 
+from design_patterns.events import bus
+
 ENCODING_TYPE = 'utf-8'
 
 
@@ -135,10 +137,12 @@ class GZIPDecorator(DataSourceDecorator):
 
     def _compress(self, blob: bytes):
         self._data = Data(gzip.compress(blob, self._compresslevel))
-        before, after = getsizeof(blob), self._data.size
-        print(f'Compressed {before}B to {after}B ({before / after:.2f}x)')
+        if bus.enabled:
+            bus.emit('GZIPDecorator', 'compressed',
+                     before=getsizeof(blob), after=self._data.size)
 
     def _inflate(self, blob: bytes):
         self._data = Data(gzip.decompress(blob))
-        before, after = getsizeof(blob), self._data.size
-        print(f'Decompressed {before}B to {after}B ({before / after:.2f}x)')
+        if bus.enabled:
+            bus.emit('GZIPDecorator', 'decompressed',
+                     before=getsizeof(blob), after=self._data.size)
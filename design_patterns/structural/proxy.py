@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
 
+from design_patterns.events import bus
+
 
 class Subject(ABC):
     """Abstract subject"""
@@ -26,7 +28,8 @@ class PaymentAPI(Subject):
 
     def get_user(self, user: str) -> int:
         calls = self._user_call(user)
-        print(f'[log] User {user} has {calls} call(s) left')
+        if bus.enabled:
+            bus.emit('PaymentAPI', 'user_call', user=user, calls_left=calls)
         return calls
 
 
@@ -39,12 +42,10 @@ class Proxy(Subject):
     def get_user(self, user: str) -> int:
         """Get user info from API"""
 
-        print(f'[log] Requesting info for {user}.')
         calls = self._subject.get_user(user)
-        if not calls:
-            print(f'[WARNING!] User has {calls} call(s) left!')
-        else:
-            print(f'[log] User has {calls} call(s) left.')
+        if bus.enabled:
+            bus.emit('Proxy', 'limit_reached' if not calls else 'request',
+                     user=user, calls_left=calls)
         return calls
 
 
@@ -1,6 +1,9 @@
 import unittest
 
-from design_patterns.creational.abstract_factory import AbstractFactory
+from design_patterns.creational.abstract_factory import (AbstractFactory,
+                                                         Chair,
+                                                         FurnitureInventory,
+                                                         Sofa, Style, Table)
 
 
 class AbstractFactoryTestCase(unittest.TestCase):
@@ -29,6 +32,54 @@ class AbstractFactoryTestCase(unittest.TestCase):
         self.assertEqual(chair.style.value, 'victorian',
                          'Incorrect Furniture style')
 
+    def test_03_cached_factory(self):
+        factory = AbstractFactory.new(style='modern')
+
+        self.assertIs(factory, AbstractFactory.new(style='modern'),
+                      'Factory is not cached')
+        self.assertIs(factory, AbstractFactory.new(style=Style.modern),
+                      'Factory is not cached by Style')
+
+    def test_04_batch_furniture(self):
+        ArtDecoFurnitureFactory = AbstractFactory.new(style='art_deco')
+
+        chairs = ArtDecoFurnitureFactory.make_chairs(1000)
+        tables = ArtDecoFurnitureFactory.make_tables(10)
+        sofas = ArtDecoFurnitureFactory.make_sofas(0)
+        sets = ArtDecoFurnitureFactory.make_set(5)
+
+        self.assertEqual(len(chairs), 1000, 'Incorrect batch size')
+        self.assertEqual(len(tables), 10, 'Incorrect batch size')
+        self.assertEqual(sofas, [], 'Incorrect batch size')
+        self.assertEqual(len(sets), 5, 'Incorrect batch size')
+        self.assertIsInstance(chairs[-1], Chair)
+        self.assertEqual([type(f) for f in sets[0]], [Chair, Table, Sofa],
+                         'Incorrect furniture set')
+        self.assertTrue(all(c.style is Style.art_deco for c in chairs),
+                        'Incorrect Furniture style')
+
+    def test_05_inventory(self):
+        inventory = FurnitureInventory()
+        inventory.add_many(Chair, Style.modern, 1000)
+        inventory.add_many(Sofa, Style.victorian, 10)
+        inventory.add(AbstractFactory.new(style='modern').make_table())
+
+        self.assertEqual(len(inventory), 1011, 'Incorrect inventory size')
+        self.assertEqual(inventory.count(Chair, Style.modern), 1000,
+                         'Incorrect kind and style count')
+        self.assertEqual(inventory.count(style=Style.modern), 1001,
+                         'Incorrect style count')
+        self.assertEqual(inventory.count(kind=Sofa), 10, 'Incorrect kind count')
+        self.assertEqual(inventory.count(Table, Style.art_deco), 0,
+                         'Incorrect kind and style count')
+        self.assertEqual(inventory.filter(kind=Table), [1010], 'Incorrect filter')
+        self.assertEqual(inventory.filter(Sofa, Style.victorian), list(range(1000, 1010)),
+                         'Incorrect filter')
+
+        sofa = inventory[1005]
+        self.assertIsInstance(sofa, Sofa)
+        self.assertIs(sofa.style, Style.victorian, 'Incorrect Furniture style')
+
 
 if __name__ == '__main__':
     unittest.main()
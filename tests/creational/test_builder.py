@@ -1,3 +1,4 @@
+import pickle
 import unittest
 
 from design_patterns.creational.builder import (Engine, Fuel, Transmission,
@@ -72,6 +73,64 @@ class BuilderTestCase(unittest.TestCase):
         self.assertIsNotNone(exported_ford)
         self.assertIsInstance(exported_ford, VehicleBuilt)
 
+    def test_04_test_builder_isolation(self):
+        blueprint = VehicleBlueprint(
+            engine=Engine(Fuel.electric),
+            transmission=Transmission.automatic,
+            wheels=4,
+            seats=5
+        )
+        builder1, builder2 = VehicleBuilder(blueprint), VehicleBuilder(blueprint)
+        builder1.build_engine()
+
+        self.assertIsNot(builder1.vehicle, builder2.vehicle)
+        self.assertIsNone(builder2.vehicle.engine)
+
+    def test_05_test_build_fleet(self):
+        blueprints = [
+            VehicleBlueprint(
+                engine=Engine(Fuel.diesel, 6),
+                transmission=Transmission.manual,
+                wheels=4,
+                seats=seats
+            ) for seats in range(1, 201)
+        ]
+
+        for processes in (False, True):
+            fleet = VehicleBuilder.build_fleet(
+                blueprints, workers=4, processes=processes, chunksize=16)
+
+            self.assertEqual([v.seats for v in fleet.vehicles], list(range(1, 201)),
+                             'Vehicles not in blueprint order')
+            self.assertTrue(all(v.is_built for v in fleet.vehicles))
+            self.assertEqual(list(fleet.timings), list(VehicleBuilder.stages),
+                             'Incorrect stage timings')
+
+        fleet = VehicleBuilder.build_fleet(blueprints[:3])
+        self.assertEqual(len(fleet.vehicles), 3)
+        self.assertGreater(fleet.elapsed, 0)
+
+    def test_06_test_engine_interning(self):
+        engine = Engine(Fuel.gasoline, 8)
+
+        self.assertIs(engine, Engine(Fuel.gasoline, 8), 'Engine is not interned')
+        self.assertIsNot(engine, Engine(Fuel.gasoline, 6))
+        self.assertIs(pickle.loads(pickle.dumps(engine)), engine,
+                      'Unpickled engine is not interned')
+        with self.assertRaises(AttributeError):
+            engine.cylinders = 12
+
+    def test_07_test_compact_vehicle(self):
+        vehicle = VehicleBuilt()
+
+        self.assertFalse(hasattr(vehicle, '__dict__'), 'Vehicle is not slotted')
+        self.assertFalse(vehicle.is_built)
+        with self.assertRaises(AttributeError):
+            vehicle.color = 'red'
+        for vehicle_type in (VehicleBlueprint, VehicleBuilt):
+            self.assertEqual(vehicle_type.__slots__, (),
+                             f'{vehicle_type.__name__} redeclares vehicle slots')
+
 
 if __name__ == '__main__':
     unittest.main()
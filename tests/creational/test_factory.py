@@ -1,6 +1,7 @@
+import asyncio
 import unittest
 
-from design_patterns.creational.factory import Factory
+from design_patterns.creational.factory import Factory, Ship, Truck
 
 
 class FactoryTestCase(unittest.TestCase):
@@ -89,6 +90,172 @@ class FactoryTestCase(unittest.TestCase):
         self.assertEqual(len(self.logistics), 0,
                          'Incorrect logistics size')
 
+    def test_06_priority_logistics(self):
+        logistics = Factory.createLogistics(priorities={'Ship': 0, 'Train': 1, 'Truck': 2})
+        logistics.add_transport(self.truck1)
+        logistics.add_transport(self.train1)
+        logistics.add_transport(self.ship1)
+        logistics.add_transport(self.truck2)
+        logistics.add_transport(self.train2)
+
+        names = [t.name for t in logistics.queue]
+        self.assertEqual(names, ['Ship', 'Train', 'Train', 'Truck', 'Truck'],
+                         'Incorrect dispatch order')
+        self.assertIs(list(logistics.queue)[1], self.train1,
+                      'Incorrect FIFO order within priority class')
+
+        logistics.add_transport(self.ship1, priority=5)
+        self.assertEqual([t.name for t in logistics.queue][-1], 'Ship',
+                         'Incorrect explicit priority')
+
+    def test_07_deliver_many(self):
+        self.logistics.add_transport(self.truck1)
+        self.logistics.add_transport(self.train1)
+        self.logistics.add_transport(self.ship1)
+
+        self.assertEqual(self.logistics.deliver_many(2), 2,
+                         'Incorrect delivered count')
+        self.assertEqual(len(self.logistics), 1,
+                         'Incorrect logistics size')
+        self.assertEqual(self.logistics.deliver_many(), 1,
+                         'Incorrect delivered count')
+        self.assertEqual(self.logistics.deliver_many(), 0,
+                         'Incorrect delivered count')
+        with self.assertRaises(IndexError):
+            self.logistics.queue.pop()
+
+    def test_08_registry(self):
+        truck = Factory.create('Truck', self.london_paris)
+        self.assertIsInstance(truck, Truck, 'Incorrect transport type')
+
+        ships = Factory.create_many('ship', [self.london_paris, self.berlin_rome],
+                                    delivery_time=0.5)
+        self.assertEqual([s.name for s in ships], ['Ship', 'Ship'],
+                         'Incorrect transport name')
+        self.assertEqual(ships[1].route, self.berlin_rome, 'Incorrect route')
+        self.assertEqual(ships[0].delivery_time, 0.5, 'Incorrect bound argument')
+
+        with self.assertRaises(ValueError):
+            Factory.create('plane', self.london_paris)
+
+
+class AsyncLogisticsTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.route = Factory.createDeliveryRoute('London', 'Paris')
+        self.logistics = Factory.createAsyncLogistics()
+
+    async def test_00_deliver_all(self):
+        for _ in range(20):
+            self.logistics.add_transport(
+                Factory.createTruck(self.route, delivery_time=0.05))
+
+        stats = await self.logistics.deliver_all(concurrency=10)
+
+        self.assertEqual(stats.delivered, 20, 'Incorrect delivered count')
+        self.assertEqual(len(self.logistics), 0, 'Incorrect logistics size')
+        self.assertLess(stats.elapsed, 0.5, 'Deliveries did not run concurrently')
+        self.assertGreater(stats.throughput, 0, 'Incorrect throughput')
+
+    async def test_01_timeout(self):
+        self.logistics.add_transport(Factory.createShip(self.route, delivery_time=1))
+        self.logistics.add_transport(Factory.createTrain(self.route))
+
+        stats = await self.logistics.deliver_all(concurrency=2, timeout=0.05)
+
+        self.assertEqual(stats.timed_out, 1, 'Incorrect timed out count')
+        self.assertEqual(stats.delivered, 1, 'Incorrect delivered count')
+
+    async def test_02_cancel(self):
+        for _ in range(10):
+            self.logistics.add_transport(
+                Factory.createTruck(self.route, delivery_time=1))
+
+        task = asyncio.create_task(self.logistics.deliver_all(concurrency=2))
+        await asyncio.sleep(0.05)
+        self.logistics.cancel()
+        stats = await task
+
+        self.assertEqual(stats.cancelled, 2, 'Incorrect cancelled count')
+        self.assertEqual(stats.delivered, 0, 'Incorrect delivered count')
+        self.assertEqual(len(self.logistics), 10, 'Cancelled transports were lost')
+
+    async def test_03_cancel_keeps_order(self):
+        urgent = [Factory.createTruck(self.route, delivery_time=1) for _ in range(3)]
+        for transport in urgent:
+            self.logistics.add_transport(transport, priority=-1)
+        for _ in range(3):
+            self.logistics.add_transport(Factory.createTruck(self.route, delivery_time=1))
+        order = list(self.logistics.queue)
+
+        task = asyncio.create_task(self.logistics.deliver_all(concurrency=2))
+        await asyncio.sleep(0.05)
+        self.logistics.cancel()
+        await task
+
+        self.assertEqual(list(self.logistics.queue), order, 'Cancel changed dispatch order')
+        self.assertEqual(self.logistics.queue.pop_item(), (-1, urgent[0]),
+                         'Cancelled transport lost its priority')
+
+    async def test_04_bad_concurrency(self):
+        with self.assertRaises(ValueError):
+            await self.logistics.deliver_all(concurrency=0)
+
+
+class RouteGraphTestCase(unittest.TestCase):
+    def setUp(self):
+        self.graph = Factory.createRouteGraph()
+        for fr, to, distance in (('London', 'Paris', 5), ('Paris', 'Berlin', 10),
+                                 ('London', 'Berlin', 20), ('Berlin', 'Rome', 15)):
+            self.graph.add_route(Factory.createDeliveryRoute(fr, to, distance))
+        self.graph.add_route(
+            Factory.createDeliveryRoute('London', 'Rome', 8), transport=Ship)
+
+    def test_00_shortest_path(self):
+        path, distance = self.graph.shortest_path('London', 'Rome')
+
+        self.assertEqual(path, ['London', 'Paris', 'Berlin', 'Rome'], 'Incorrect path')
+        self.assertEqual(distance, 30, 'Incorrect distance')
+
+    def test_01_transport_path(self):
+        path, distance = self.graph.shortest_path('London', 'Rome', Ship)
+        self.assertEqual(path, ['London', 'Rome'], 'Incorrect ship path')
+
+        truck = Factory.createTruck(Factory.createDeliveryRoute('Rome', 'London'))
+        path, distance = self.graph.plan(truck)
+        self.assertEqual(path, ['Rome', 'Berlin', 'Paris', 'London'], 'Incorrect truck path')
+
+    def test_02_cache(self):
+        self.graph.shortest_path('London', 'Rome', Truck)
+        self.graph.shortest_path('London', 'Berlin', Truck)
+
+        self.assertEqual(self.graph.misses, 1, 'Incorrect cache misses')
+        self.assertEqual(self.graph.hits, 1, 'Incorrect cache hits')
+
+    def test_03_invalidation(self):
+        self.graph.shortest_path('London', 'Rome')
+        self.graph.shortest_path('Rome', 'London')
+
+        # Edge not on any cached path and not shorter, caches stay valid
+        self.graph.set_distance('London', 'Berlin', 25)
+        self.assertEqual(self.graph.invalidations, 0, 'Unaffected tree dropped')
+
+        self.graph.set_distance('Paris', 'Berlin', 100)
+        self.assertEqual(self.graph.invalidations, 2, 'Affected trees kept')
+        path, distance = self.graph.shortest_path('London', 'Rome')
+        self.assertEqual(path, ['London', 'Berlin', 'Rome'], 'Incorrect path')
+        self.assertEqual(distance, 40, 'Incorrect distance')
+
+        self.graph.add_route(Factory.createDeliveryRoute('Paris', 'Rome', 1))
+        path, distance = self.graph.shortest_path('London', 'Rome')
+        self.assertEqual(path, ['London', 'Paris', 'Rome'], 'Incorrect path')
+
+    def test_04_no_route(self):
+        self.graph.remove_route('Berlin', 'Rome')
+        with self.assertRaises(ValueError):
+            self.graph.shortest_path('London', 'Rome', Truck)
+        with self.assertRaises(ValueError):
+            self.graph.set_distance('London', 'Paris', -1)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,7 +1,13 @@
+import math
+import random
+import tempfile
 import unittest
+from pathlib import Path
 from unicodedata import decimal
 
-from design_patterns.creational.prototype import Prototype
+from design_patterns.creational.prototype import (Circle, Prototype,
+                                                  PrototypeSnapshot, Rectangle,
+                                                  Shape, ShapeBatch, ShapeGrid)
 
 
 class PrototypeTestCase(unittest.TestCase):
@@ -28,6 +34,199 @@ class PrototypeTestCase(unittest.TestCase):
 
         self.assertEqual(int(shape3.get_area()), 706)
 
+    def test_03_test_clone(self):
+        shape = self.prototype.get_shape(2)
+
+        self.assertIsNot(shape, self.prototype.cache[2])
+        self.assertEqual(shape.name, 'Square')
+        self.assertEqual(shape.get_area(), 121)
+
+    def test_04_test_spawn(self):
+        shapes = self.prototype.spawn(3, 1000, x=5, color='red')
+
+        self.assertEqual(len(shapes), 1000)
+        self.assertEqual(len({id(s) for s in shapes}), 1000, 'Clones are shared')
+        self.assertEqual((shapes[0].x, shapes[0].color), (5, 'red'))
+        self.assertEqual(shapes[-1].radius, 14)
+        self.assertEqual(self.prototype.cache[3].color, 'black',
+                         'Prototype was modified')
+
+        shapes[0].x = 7
+        self.assertEqual(shapes[1].x, 5, 'Clone state is shared')
+
+        with self.assertRaises(AttributeError):
+            self.prototype.spawn(3, 1, width=2)
+
+    def test_05_test_unknown_shape(self):
+        with self.assertRaises(KeyError):
+            self.prototype.get_shape(404)
+        with self.assertRaises(KeyError):
+            self.prototype.spawn(404, 10)
+
+    def test_06_test_snapshot(self):
+        shapes = {sid: Rectangle(sid, 2, x=sid, name=f'Rect {sid}') for sid in range(10, 1000)}
+        shapes[5] = Circle(2.5, y=-3, color='blue', name='Circle ø')
+        for sid, shape in shapes.items():
+            shape.set_id(sid)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'shapes.bin'
+            PrototypeSnapshot.write(path, shapes)
+            snapshot = PrototypeSnapshot(path)
+
+            self.assertEqual(len(snapshot), 991)
+            self.assertIn(500, snapshot)
+            self.assertNotIn(4, snapshot)
+            self.assertIsNone(snapshot.get(4))
+
+            rect = snapshot.get(500)
+            self.assertIsInstance(rect, Rectangle)
+            self.assertEqual(vars(rect), vars(shapes[500]))
+
+            circle = snapshot.get(5)
+            self.assertEqual(vars(circle), vars(shapes[5]))
+            self.assertIsInstance(circle.radius, float)
+            self.assertIsInstance(circle.y, int)
+            snapshot.close()
+
+            path.write_bytes(b'NOPE' + bytes(12))
+            with self.assertRaises(ValueError):
+                PrototypeSnapshot(path)
+
+    def test_07_test_prototype_open(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'shapes.bin'
+            self.prototype.save(path)
+            Prototype.cache = {}
+            self.prototype.open(path)
+
+            self.assertEqual(len(self.prototype.cache), 0, 'Snapshot was loaded eagerly')
+            shape = self.prototype.get_shape(2)
+            self.assertEqual(shape.get_area(), 121)
+            self.assertEqual(len(self.prototype.cache), 1)
+            self.assertEqual(len(self.prototype.spawn(3, 5)), 5)
+            with self.assertRaises(KeyError):
+                self.prototype.get_shape(404)
+
+            Prototype.snapshot.close()
+            Prototype.snapshot = None
+            self.prototype.load()
+
+    def test_08_test_shape_batch(self):
+        shapes = [Rectangle(w, 2, x=w, name=f'Rect {w}') for w in range(1, 101)]
+        shapes += self.prototype.spawn(3, 10, color='red')
+        batch = ShapeBatch.from_shapes(shapes)
+
+        self.assertEqual(len(batch), 110)
+        self.assertEqual(batch.kinds, [Rectangle, Circle])
+        self.assertEqual(list(batch.areas(Rectangle))[:3], [2, 4, 6])
+        self.assertAlmostEqual(batch.total_area(),
+                               sum(s.get_area() for s in shapes))
+
+        large = batch.filter(min_area=190)
+        self.assertEqual(len(large), 15)
+        self.assertEqual([s.name for s in large.to_shapes()][:5],
+                         [f'Rect {w}' for w in range(96, 101)])
+
+        rebuilt = batch.to_shapes()
+        self.assertIsInstance(rebuilt[-1], Circle)
+        self.assertEqual((rebuilt[-1].color, rebuilt[-1].radius), ('red', 14))
+        self.assertTrue(math.isclose(rebuilt[-1].get_area(), shapes[-1].get_area()))
+        self.assertEqual(rebuilt[-1].id, shapes[-1].id, 'Shape id lost in batch')
+        self.assertFalse(hasattr(rebuilt[0], 'id'))
+        self.assertEqual(batch.filter(min_area=0).to_shapes()[-1].id, shapes[-1].id)
+
+    def test_09_test_shape_grid(self):
+        rnd = random.Random(1)
+        shapes = self.prototype.spawn(1, 2000)
+        for shape in shapes:
+            shape.x, shape.y = rnd.uniform(-500, 500), rnd.uniform(-500, 500)
+        grid = ShapeGrid(cell_size=25)
+        grid.extend(shapes)
+
+        self.assertEqual(len(grid), 2000)
+        self.assertIn(shapes[0], grid)
+
+        found = grid.query(-100, -50, 120, 80)
+        expected = [s for s in shapes if -100 <= s.x <= 120 and -50 <= s.y <= 80]
+        self.assertCountEqual(found, expected, 'Incorrect range query')
+
+        near = grid.within(10, 10, 60)
+        expected = [s for s in shapes if math.hypot(s.x - 10, s.y - 10) <= 60]
+        self.assertCountEqual(near, expected, 'Incorrect radius query')
+
+        for x, y in ((0, 0), (499, -499), (3000, 3000)):
+            nearest = grid.nearest(x, y)
+            expected = min(shapes, key=lambda s: math.hypot(s.x - x, s.y - y))
+            self.assertIs(nearest, expected, 'Incorrect nearest shape')
+
+    def test_10_test_shape_grid_update(self):
+        grid = ShapeGrid(cell_size=10)
+        self.assertIsNone(grid.nearest(0, 0))
+
+        shape = self.prototype.get_shape(3)
+        grid.insert(shape)
+        with self.assertRaises(ValueError):
+            grid.insert(shape)
+
+        grid.move(shape, 105, 5)
+        self.assertEqual(grid.query(0, 0, 50, 50), [])
+        self.assertEqual(grid.query(100, 0, 110, 10), [shape])
+        self.assertIs(grid.nearest(0, 0), shape)
+
+        near_edge = [self.prototype.get_shape(3), self.prototype.get_shape(3)]
+        near_edge[0].x, near_edge[0].y = 0, 5
+        near_edge[1].x, near_edge[1].y = 10, 5
+        grid.extend(near_edge)
+        self.assertIs(grid.nearest(9.9, 5), near_edge[1], 'Closer shape in next cell missed')
+        for other in near_edge:
+            grid.remove(other)
+
+        grid.remove(shape)
+        self.assertEqual(len(grid), 0)
+        self.assertEqual(grid.cells, {})
+        with self.assertRaises(KeyError):
+            grid.update(shape)
+
+    def test_11_test_shape_without_area_of(self):
+
+        class Square(Shape):
+            dimensions = ('side',)
+
+            def __init__(self, side: int = 0, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.side = side
+
+            def get_area(self) -> int:
+                return self.side ** 2
+
+        squares = [Square(side, name=f'Square {side}') for side in range(1, 6)]
+        batch = ShapeBatch.from_shapes(squares + [Rectangle(2, 3)])
+
+        self.assertEqual(list(batch.areas(Square)), [1, 4, 9, 16, 25])
+        self.assertEqual(batch.total_area(), 61)
+        self.assertEqual([s.name for s in batch.filter(min_area=10).to_shapes()],
+                         ['Square 4', 'Square 5'])
+
+    def test_12_test_sparse_shape_grid(self):
+        rnd = random.Random(2)
+        far = [self.prototype.get_shape(3), self.prototype.get_shape(3)]
+        far[1].x, far[1].y = 4000, 4000
+        grid = ShapeGrid(cell_size=1)
+        grid.extend(far)
+
+        self.assertIs(grid.nearest(10, 10), far[0])
+        self.assertIs(grid.nearest(3990, 3999), far[1])
+
+        shapes = self.prototype.spawn(1, 50)
+        for shape in shapes:
+            shape.x, shape.y = rnd.uniform(-300, 300), rnd.uniform(-300, 300)
+        grid.extend(shapes)
+        for _ in range(200):
+            x, y = rnd.uniform(-400, 400), rnd.uniform(-400, 400)
+            closest = min(far + shapes, key=lambda s: math.hypot(s.x - x, s.y - y))
+            self.assertIs(grid.nearest(x, y), closest)
+
 
 if __name__ == '__main__':
     unittest.main()
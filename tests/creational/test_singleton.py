@@ -1,7 +1,12 @@
+import asyncio
+import os
+import threading
 import unittest
 from unicodedata import decimal
 
-from design_patterns.creational.singleton import DatabasePrototype
+from design_patterns.creational.singleton import (ConnectionPool,
+                                                  DatabasePrototype,
+                                                  QueryCache, statement_info)
 
 
 class PrototypeTestCase(unittest.TestCase):
@@ -17,11 +22,237 @@ class PrototypeTestCase(unittest.TestCase):
 
     def test_02_test_query(self):
 
+        self.db.query('CREATE TABLE IF NOT EXISTS Customers (name TEXT);')
+        self.db.query('INSERT INTO Customers VALUES (?), (?);', ('Alice', 'Bob'))
+
         query = 'SELECT * FROM Customers;'
 
         result = self.db.query(query)
 
-        self.assertEqual(result, f'Result for {query}', 'Incorrect db query result')
+        self.assertEqual(result, [('Alice',), ('Bob',)], 'Incorrect db query result')
+
+    def test_03_test_thread_safe_instance(self):
+        DatabasePrototype._instance = None
+        barrier = threading.Barrier(8)
+        instances = []
+
+        def create():
+            barrier.wait()
+            instances.append(DatabasePrototype.instance())
+
+        threads = [threading.Thread(target=create) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({id(i) for i in instances}), 1, 'Several instances created')
+        PrototypeTestCase.db = instances[0]
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'Requires fork')
+    def test_04_test_fork(self):
+        pid = os.fork()
+        if not pid:
+            os._exit(0 if DatabasePrototype._instance is None else 1)
+        _, status = os.waitpid(pid, 0)
+
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0,
+                         'Child process inherited the instance')
+        self.assertIs(DatabasePrototype.instance(), self.db)
+
+    def test_05_test_pool(self):
+        pool = ConnectionPool(size=2)
+
+        with pool.connection() as first:
+            first.execute('SELECT 1')
+            second = pool.checkout()
+            self.assertEqual(pool.stats.in_use, 2)
+            with self.assertRaises(TimeoutError):
+                pool.checkout(timeout=0.05)
+
+            threading.Timer(0.05, pool.checkin, (second,)).start()
+            third = pool.checkout(timeout=1)
+            self.assertIs(third, second, 'Connection was not reused')
+            pool.checkin(third)
+
+        stats = pool.stats
+        self.assertEqual((stats.created, stats.in_use, stats.idle), (2, 0, 2))
+        self.assertEqual((stats.checkouts, stats.waits, stats.timeouts), (3, 1, 1))
+        self.assertGreater(stats.max_wait, 0.04)
+
+        pool.close()
+        self.assertEqual(pool.stats.created, 0)
+        with self.assertRaises(RuntimeError):
+            pool.checkout()
+
+    def test_06_test_bad_pool(self):
+        with self.assertRaises(ValueError):
+            ConnectionPool(size=0)
+
+    def test_07_test_query_cache(self):
+        self.db.query('CREATE TABLE IF NOT EXISTS Products (name TEXT);')
+        self.db.query('CREATE TABLE IF NOT EXISTS Orders (id INTEGER);')
+        self.db.query('INSERT INTO Products VALUES (?);', ('Phone',))
+        cache = self.db.enable_cache(maxsize=2)
+
+        query = 'SELECT name FROM Products;'
+        self.assertEqual(self.db.query(query), [('Phone',)])
+        self.assertEqual(self.db.query(query), [('Phone',)])
+        self.db.query('SELECT * FROM Orders;')
+
+        self.db.query('INSERT INTO Orders VALUES (1);')
+        self.assertEqual(len(cache), 1, 'Unrelated result was invalidated')
+
+        self.db.query('INSERT INTO Products VALUES (?);', ('Laptop',))
+        self.assertEqual(self.db.query(query), [('Phone',), ('Laptop',)],
+                         'Stale result after write')
+
+        self.db.query('SELECT 1 FROM Products;')
+        self.db.query('SELECT 2 FROM Products;')
+
+        stats = cache.stats
+        self.assertEqual((stats.hits, stats.misses), (1, 5))
+        self.assertEqual((stats.invalidations, stats.evictions), (2, 1))
+        self.assertAlmostEqual(stats.hit_rate, 1 / 6)
+
+        self.db.disable_cache()
+        self.assertIsNone(self.db.cache)
+
+    def test_08_test_query_cache_ttl(self):
+        now = [0.0]
+        cache = QueryCache(ttl=10, clock=lambda: now[0])
+        cache.put('SELECT * FROM Customers', (), [('Alice',)])
+
+        self.assertEqual(cache.get('SELECT * FROM Customers'), [('Alice',)])
+        self.assertIsNone(cache.get('SELECT * FROM Customers', (1,)))
+        now[0] = 11
+        self.assertIsNone(cache.get('SELECT * FROM Customers'))
+        self.assertEqual(cache.stats.expirations, 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_09_test_query_many(self):
+        self.db.query('CREATE TABLE IF NOT EXISTS Payments (amount INTEGER);')
+        cache = self.db.enable_cache()
+        self.db.query('SELECT COUNT(*) FROM Payments;')
+
+        count = self.db.query_many('INSERT INTO Payments VALUES (?);',
+                                   ((i,) for i in range(100)))
+
+        self.assertEqual(count, 100)
+        self.assertEqual(len(cache), 0, 'Cached result not invalidated')
+        self.assertEqual(self.db.query('SELECT SUM(amount) FROM Payments;'), [(4950,)])
+
+        with self.assertRaises(Exception):
+            self.db.query_many('INSERT INTO Payments VALUES (?);', [(1,), (2, 3)])
+        self.assertEqual(self.db.query('SELECT COUNT(*) FROM Payments;'), [(100,)],
+                         'Failed batch was not rolled back')
+        self.db.disable_cache()
+
+    def test_10_test_statement_info(self):
+        self.assertEqual(statement_info('SELECT * FROM Payments'),
+                         (True, frozenset({'payments'})))
+        self.assertIs(statement_info('SELECT * FROM Payments'),
+                      statement_info('SELECT * FROM Payments'))
+        self.assertEqual(statement_info('SELECT * FROM a AS x, "b", c WHERE x.id = 1'),
+                         (True, frozenset({'a', 'b', 'c'})))
+        self.assertEqual(statement_info('WITH t AS (SELECT 1) DELETE FROM a'),
+                         (False, frozenset({'a'})))
+
+    def test_11_test_concurrent_writers(self):
+        self.db.query('CREATE TABLE IF NOT EXISTS Events (id INTEGER);')
+        errors = []
+
+        def write(worker):
+            try:
+                for i in range(200):
+                    self.db.query('INSERT INTO Events VALUES (?);', (worker * 200 + i,))
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=write, args=(w,)) for w in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [], 'Concurrent writes failed')
+        self.assertEqual(self.db.query('SELECT COUNT(*) FROM Events;'), [(1000,)])
+
+    def test_12_test_temporary_database(self):
+        pool = ConnectionPool(size=1)
+        with pool.connection() as connection:
+            mode = connection.execute('PRAGMA journal_mode').fetchone()
+        self.assertEqual(mode, ('wal',))
+        self.assertTrue(os.path.exists(pool.database))
+
+        pool.close()
+        self.assertFalse(os.path.exists(pool.database), 'Temporary database not removed')
+
+    def test_13_test_query_cache_comma_join(self):
+        self.db.query('CREATE TABLE IF NOT EXISTS Cities (name TEXT);')
+        self.db.query('CREATE TABLE IF NOT EXISTS Roads (name TEXT);')
+        self.db.enable_cache()
+        self.db.query('INSERT INTO Cities VALUES (?);', ('Paris',))
+        query = 'SELECT Cities.name, Roads.name FROM Cities, Roads;'
+        self.assertEqual(self.db.query(query), [])
+
+        self.db.query('INSERT INTO Roads VALUES (?);', ('A1',))
+        self.assertEqual(self.db.query(query), [('Paris', 'A1')], 'Stale join result')
+
+        subquery = 'SELECT COUNT(*) FROM (SELECT name FROM Cities), Roads;'
+        self.assertEqual(self.db.query(subquery), [(1,)])
+        self.db.query('INSERT INTO Roads VALUES (?);', ('A6',))
+        self.assertEqual(self.db.query(subquery), [(2,)], 'Stale subquery result')
+        self.db.disable_cache()
+
+    def test_14_test_query_cache_cte_write(self):
+        self.db.query('CREATE TABLE IF NOT EXISTS Labels (name TEXT);')
+        cache = self.db.enable_cache()
+        self.assertEqual(self.db.query('SELECT * FROM Labels;'), [])
+        write = "WITH t AS (SELECT 'new' AS name) INSERT INTO Labels SELECT name FROM t;"
+
+        for _ in range(3):
+            self.db.query(write)
+
+        self.assertEqual(self.db.query('SELECT COUNT(*) FROM Labels;'), [(3,)],
+                         'Write was served from cache')
+        self.assertEqual(len(self.db.query('SELECT * FROM Labels;')), 3, 'Stale read')
+        self.assertFalse(any(key[0] == write for key in cache._entries))
+        self.db.disable_cache()
+
+    def test_15_test_query_cache_read_write_race(self):
+        self.db.query('CREATE TABLE IF NOT EXISTS Stock (amount INTEGER);')
+        cache = self.db.enable_cache()
+        read = 'SELECT COUNT(*) FROM Stock;'
+        put = cache.put
+
+        def racing_put(*args):
+            # A write lands between the read and storing its result
+            self.db.query('INSERT INTO Stock VALUES (?);', (1,))
+            put(*args)
+
+        cache.put = racing_put
+        self.assertEqual(self.db.query(read), [(0,)])
+        cache.put = put
+
+        self.assertIsNone(cache.get(read), 'Result read before the write was cached')
+        self.assertEqual(self.db.query(read), [(1,)])
+        self.assertEqual(self.db.query(read), [(1,)])
+        self.assertEqual(cache.stats.hits, 1)
+        self.db.disable_cache()
+
+
+class AsyncDatabaseTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def test_00_test_aquery(self):
+        db = DatabasePrototype.instance()
+        await db.aquery('CREATE TABLE IF NOT EXISTS Visits (page TEXT);')
+        await db.aquery_many('INSERT INTO Visits VALUES (?);', [('home',), ('about',)])
+
+        results = await asyncio.gather(
+            *(db.aquery('SELECT COUNT(*) FROM Visits;') for _ in range(20)))
+
+        self.assertEqual(results, [[(2,)]] * 20)
 
 
 if __name__ == '__main__':
@@ -1,6 +1,27 @@
+import io
+import json
+import tempfile
 import unittest
+from dataclasses import dataclass, make_dataclass
+from pathlib import Path
 
-from design_patterns.structural.adapter import Adapter, NewsArticle
+from design_patterns.structural.adapter import (Adapter, BinaryMediaParser,
+                                               ConversionCache, MediaClass,
+                                               MediaSchema, NewsArticle,
+                                               XMLMediaParser, XMLMediaWriter)
+
+
+@dataclass
+class TaggedArticle(NewsArticle):
+    """News Article with a field appended in a later layout"""
+    tag: str = 'none'
+
+
+@dataclass
+class ReorderedArticle(MediaClass):
+    """News Article with its title and published fields swapped"""
+    published: str = ''
+    title: str = ''
 
 
 class AdapterTestCase(unittest.TestCase):
@@ -82,6 +103,198 @@ class AdapterTestCase(unittest.TestCase):
         self.assertEqual('<title>Amazing content</title>' in parse_article, True)
         self.assertEqual('<text>This is good content</text>' in parse_article, True)
 
+    def test_09_xml_iterparse(self):
+        feed = '<feed>' + self.sample_news_xml * 3 + '</feed>'
+        articles = list(XMLMediaParser.iterparse(
+            NewsArticle, io.BytesIO(feed.encode())))
+
+        self.assertEqual(len(articles), 3)
+        self.assertIsInstance(articles[0], NewsArticle)
+        self.assertEqual(articles[2].title, 'Amazing content')
+        self.assertEqual(articles[2].published, '02/01/2022, 00:00')
+
+    def test_10_rss_iterparse(self):
+        rss = b'''<?xml version="1.0"?>
+        <rss version="2.0"><channel>
+            <title>Python Insider</title>
+            <item><title>Release 1</title><description>First</description>
+                  <pubDate>Mon, 02 Jan 2023</pubDate><guid>1</guid></item>
+            <item><title>Release 2</title><description>Second</description></item>
+        </channel></rss>'''
+        articles = XMLMediaParser.iterparse(
+            NewsArticle, io.BytesIO(rss), tag='item',
+            aliases={'description': 'text', 'pubDate': 'published'})
+
+        first = next(articles)
+        self.assertEqual((first.title, first.text, first.published),
+                         ('Release 1', 'First', 'Mon, 02 Jan 2023'))
+        self.assertEqual([a.title for a in articles], ['Release 2'])
+
+    def test_11_atom_iterparse(self):
+        atom = b'''<feed xmlns="http://www.w3.org/2005/Atom">
+            <entry><title>Atom entry</title><published>2023</published></entry>
+        </feed>'''
+        articles = list(XMLMediaParser.iterparse(NewsArticle, io.BytesIO(atom), tag='entry'))
+
+        self.assertEqual([(a.title, a.published) for a in articles], [('Atom entry', '2023')])
+
+    def test_12_media_schema(self):
+        schema = MediaSchema.of(NewsArticle)
+
+        self.assertIs(schema, MediaSchema.of(NewsArticle), 'Schema is not cached')
+        self.assertEqual(schema.names, ('created', 'text', 'title', 'published'))
+
+        article = NewsArticle(title='Fish & <Chips>', text='test string')
+        self.assertEqual(schema.to_dict(article)['title'], 'Fish & <Chips>')
+
+        xml = self.adapter.xml_parser.to_text(article)
+        self.assertIn('<title>Fish &amp; &lt;Chips&gt;</title>', xml)
+        self.assertEqual(self.adapter.xml_to_obj(NewsArticle, xml), article,
+                         'XML round trip changed the article')
+        self.assertIn('<Item><created>',
+                      self.adapter.xml_parser.to_text(article, root='Item'))
+
+    def test_13_bulk_conversion(self):
+        articles = [NewsArticle(title=f'Article {i}', text=f'Text\nline {i}')
+                    for i in range(250)]
+        ndjson = ''.join(self.adapter.json_parser.to_text(a) + '\n\n' for a in articles)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            src, xml, out = (Path(tmp) / name for name in ('in.ndjson', 'out.xml', 'out.ndjson'))
+            src.write_text(ndjson, encoding='utf-8')
+
+            stats = self.adapter.ndjson_to_xml(NewsArticle, src, xml, workers=2, chunksize=16)
+            self.assertEqual(stats.records, 250)
+            self.assertGreater(stats.throughput, 0)
+            self.assertEqual(len(xml.read_text(encoding='utf-8').splitlines()), 250,
+                             'XML record split over lines')
+
+            stats = self.adapter.xml_to_ndjson(NewsArticle, xml, out, chunksize=7)
+            self.assertEqual(stats.records, 250)
+
+            lines = out.read_text(encoding='utf-8').splitlines()
+            self.assertEqual([json.loads(line)['title'] for line in lines],
+                             [a.title for a in articles], 'Records not in input order')
+            self.assertEqual(json.loads(lines[3])['text'], 'Text\nline 3')
+
+    def test_14_bulk_conversion_error(self):
+        src = io.StringIO(self.sample_news_xml * 2 + '<NewsArticle><title>')
+        dst = io.StringIO()
+
+        with self.assertRaises(ValueError):
+            self.adapter.xml_to_ndjson(NewsArticle, src, dst, chunksize=1)
+        self.assertEqual(len(dst.getvalue().splitlines()), 2)
+
+    def test_15_xml_writer(self):
+        articles = (NewsArticle(title=f'<Article> {i}', text='Q&A') for i in range(100))
+        file = io.StringIO()
+
+        count = XMLMediaParser.dump(articles, file, collection='articles')
+
+        self.assertEqual(count, 100)
+        document = file.getvalue()
+        self.assertTrue(document.startswith('<?xml'))
+        self.assertIn('<text>Q&amp;A</text><title>&lt;Article&gt; 7</title>', document)
+        self.assertTrue(document.endswith('</articles>\n'))
+
+        parsed = list(XMLMediaParser.iterparse(
+            NewsArticle, io.BytesIO(document.encode())))
+        self.assertEqual(len(parsed), 100)
+        self.assertEqual(parsed[42].title, '<Article> 42')
+
+    def test_16_xml_writer_close(self):
+        file = io.StringIO()
+        with XMLMediaWriter(file, declaration=False) as writer:
+            writer.write(NewsArticle(title='one'))
+            self.assertNotIn('</collection>', file.getvalue())
+
+        self.assertEqual(writer.count, 1)
+        self.assertTrue(file.getvalue().startswith('<collection>'))
+        with self.assertRaises(ValueError):
+            writer.write(NewsArticle())
+
+    def test_17_binary_conversion(self):
+        data = self.adapter.json_to_binary(NewsArticle, self.sample_news_json)
+
+        self.assertIsInstance(data, bytes)
+        self.assertLess(len(data), len(self.adapter.json_to_xml(
+            NewsArticle, self.sample_news_json)))
+        article = self.adapter.binary_to_obj(NewsArticle, data)
+        self.assertEqual(article.title, 'Amazing content')
+        self.assertEqual(json.loads(self.adapter.binary_to_json(NewsArticle, data))['published'],
+                         '02/01/2022, 00:00')
+        self.assertEqual(self.adapter.xml_to_binary(NewsArticle, self.sample_news_xml), data)
+        self.assertEqual(self.adapter.binary_to_obj(
+            NewsArticle, self.adapter.xml_to_binary(
+                NewsArticle, self.adapter.binary_to_xml(NewsArticle, data))), article)
+
+    def test_18_binary_batch(self):
+        articles = [NewsArticle(title=f'Ärticle {i}', text='€' * i) for i in range(50)]
+        data = BinaryMediaParser.to_text_many(iter(articles))
+
+        buffer = memoryview(bytearray(b'head' + data))[4:]
+        self.assertEqual(BinaryMediaParser.parse_many(NewsArticle, buffer), articles)
+        self.assertEqual(BinaryMediaParser.parse_many(
+            NewsArticle, BinaryMediaParser.to_text_many([])), [])
+
+    def test_19_binary_schema_versions(self):
+        tagged = TaggedArticle(title='new', tag='python')
+        old = BinaryMediaParser.to_text(NewsArticle(title='old'))
+
+        self.assertEqual(BinaryMediaParser.parse(TaggedArticle, old).tag, 'none',
+                         'Missing field does not keep its default')
+        article = BinaryMediaParser.parse(NewsArticle, BinaryMediaParser.to_text(tagged))
+        self.assertEqual(article.title, 'new')
+        with self.assertRaises(ValueError, msg='Record of reordered fields was decoded'):
+            BinaryMediaParser.parse(ReorderedArticle, old)
+
+    def test_20_binary_errors(self):
+        data = BinaryMediaParser.to_text(NewsArticle())
+
+        for bad in (data[:-1], data + b'\x00', b'\x01' + data[1:], b''):
+            with self.assertRaises(ValueError):
+                BinaryMediaParser.parse(NewsArticle, bad)
+        with self.assertRaises(ValueError):
+            BinaryMediaParser.parse_many(NewsArticle, b'\x02\x00\x00\x00' + data)
+
+    def test_21_conversion_cache(self):
+        cache = self.adapter.enable_cache(maxsize=2)
+        try:
+            xml = self.adapter.json_to_xml(NewsArticle, self.sample_news_json)
+            self.assertEqual(self.adapter.json_to_xml(NewsArticle, self.sample_news_json), xml)
+            self.assertEqual(len(cache), 1)
+
+            self.adapter.xml_to_json(NewsArticle, xml)
+            self.adapter.xml_to_json(NewsArticle, self.sample_news_xml)
+            self.assertEqual(len(cache), 2, 'Cache grew past maxsize')
+
+            stats = cache.stats
+            self.assertEqual((stats.hits, stats.misses, stats.evictions), (1, 3, 1))
+            self.assertEqual(stats.hit_rate, 0.25)
+        finally:
+            self.adapter.disable_cache()
+        self.assertIsNone(self.adapter.cache)
+
+    def test_22_conversion_cache_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            key = ConversionCache.key(NewsArticle, 'xml', self.sample_news_json)
+            self.assertNotEqual(key, ConversionCache.key(
+                TaggedArticle, 'xml', self.sample_news_json))
+
+            ConversionCache(directory=tmp).put(key, '<NewsArticle />')
+            cache = ConversionCache(directory=tmp)
+            self.assertEqual(cache.get(key), '<NewsArticle />')
+            self.assertEqual(cache.get(key), '<NewsArticle />')
+            self.assertEqual(cache.stats.disk_hits, 1, 'Disk hit not kept in memory')
+            self.assertEqual(list(Path(tmp).iterdir()), [Path(tmp) / key])
+
+        # Same class name and module, fields changed between releases
+        before = make_dataclass('Article', [('title', str, '')], bases=(MediaClass,))
+        after = make_dataclass('Article', [('headline', str, '')], bases=(MediaClass,))
+        self.assertNotEqual(ConversionCache.key(before, 'xml', self.sample_news_json),
+                            ConversionCache.key(after, 'xml', self.sample_news_json),
+                            'Result of an older class layout would be reused')
+
 
 if __name__ == '__main__':
     unittest.main()
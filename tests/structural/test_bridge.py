@@ -1,6 +1,36 @@
+import asyncio
+import time
 import unittest
 
-from design_patterns.structural.bridge import TV, BridgeRemote, Radio
+from design_patterns.structural.bridge import (TV, AsyncBridgeRemote,
+                                              BridgeRemote, DeviceFleet,
+                                              DeviceState, Radio, StateJournal,
+                                              StateReplica)
+
+
+class CountingTV(TV):
+    """TV counting the calls it receives"""
+    calls = 0
+
+    def get_volume(self) -> int:
+        self.calls += 1
+        return super().get_volume()
+
+    def set_volume(self, volume: int) -> None:
+        self.calls += 1
+        super().set_volume(volume)
+
+    def get_channel(self) -> int:
+        self.calls += 1
+        return super().get_channel()
+
+    def set_channel(self, channel: int) -> None:
+        self.calls += 1
+        super().set_channel(channel)
+
+    def toggle_power(self) -> None:
+        self.calls += 1
+        super().toggle_power()
 
 
 class BridgeTestCase(unittest.TestCase):
@@ -59,6 +89,251 @@ class BridgeTestCase(unittest.TestCase):
         self.assertEqual(tv.get_channel(), 4)
         self.assertEqual(radio.get_channel(), 2)
 
+    def test_04_fleet_group_volume(self):
+        fleet = DeviceFleet()
+        fleet.add(TV, 5, group='lobby')
+        radios = fleet.add(Radio, 5)
+        fleet.add_to_group('lobby', [radios[0], radios[0]])
+
+        self.assertEqual(fleet.volume_up(20, group='lobby'), 6)
+        self.assertEqual(list(fleet.volume), [70] * 6 + [50] * 4)
+        self.assertEqual(fleet.channel_down(kind=Radio), 5)
+        self.assertEqual(fleet.set_volume(0), 10)
+        self.assertEqual(fleet.channel[radios[1]], 0)
+        self.assertEqual(sum(fleet.volume), 0)
+
+        with self.assertRaises(KeyError):
+            fleet.volume_up(group='kitchen')
+        self.assertEqual(len(fleet.ids()), 10)
+        self.assertEqual(list(fleet.ids(group='lobby', kind=Radio)), [radios[0]])
+        self.assertIsInstance(fleet.device(radios[1]).state, DeviceState)
+
+        lobby = fleet.ids(group='lobby')
+        lobby[0] = radios[4]
+        fleet.add(TV, group='lobby')
+        self.assertEqual(list(fleet.ids(group='lobby')), [0, 1, 2, 3, 4, radios[0], 10],
+                         'Group ids share storage with the group')
+
+        fleet.set_volume(2 ** 31 - 5, group='lobby')
+        with self.assertRaises(OverflowError):
+            fleet.volume_up(10)
+        self.assertEqual(sum(fleet.volume), 7 * (2 ** 31 - 5), 'Failed operation changed devices')
+        with self.assertRaises(OverflowError):
+            fleet.set_channel(-2 ** 31 - 1, kind=TV)
+
+    def test_05_fleet_power(self):
+        fleet = DeviceFleet()
+        fleet.add(TV, 3)
+        fleet.add(Radio, 4, group='garage')
+
+        fleet.power_on()
+        self.assertEqual(fleet.power_off(kind=Radio), 4)
+        self.assertEqual(fleet.enabled_count(), 3)
+        self.assertEqual(fleet.toggle_power(group='garage'), 4)
+        self.assertEqual(fleet.enabled_count(kind=Radio), 4)
+        self.assertEqual(fleet.enabled_count(group='garage', kind=TV), 0)
+
+    def test_06_fleet_device_view(self):
+        fleet = DeviceFleet()
+        fleet.add(Radio)
+        tv_id = fleet.add(TV)[0]
+
+        tv = fleet.device(tv_id)
+        self.assertIsInstance(tv, TV)
+        remote = BridgeRemote(tv, volume_increment=5)
+        remote.volume_up()
+        remote.channel_up()
+        remote.toggle_power()
+
+        self.assertEqual((fleet.volume[tv_id], fleet.channel[tv_id]), (55, 2))
+        self.assertIs(tv.is_enabled(), True)
+        fleet.volume_down(kind=TV)
+        self.assertEqual(tv.get_volume(), 45, 'View does not see bulk changes')
+
+        with self.assertRaises(IndexError):
+            fleet.device(2)
+
+    def test_07_state_journal(self):
+        journal = StateJournal()
+        tv = journal.track(TV(), 'tv')
+        radio = journal.track(Radio(), 'radio')
+        self.assertEqual(journal.version, 6, 'Initial state not recorded')
+        version = journal.version
+
+        remote = BridgeRemote(tv)
+        remote.volume_up()
+        remote.volume_up()
+        remote.toggle_power()
+        radio.set_channel(1)
+
+        delta = journal.delta(version)
+        self.assertEqual([change[1:] for change in delta.changes],
+                         [('tv', 'volume', 70), ('tv', 'enabled', True)])
+        self.assertEqual(delta.version, journal.version)
+        self.assertEqual(len(journal), 6, 'Journal keeps superseded changes')
+        self.assertEqual(len(journal.delta(journal.version)), 0)
+
+    def test_08_replica_sync(self):
+        journal = StateJournal()
+        devices = [journal.track(TV(), i) for i in range(100)]
+        replica = StateReplica()
+
+        self.assertEqual(replica.sync(journal), 300)
+        devices[7].set_volume(5)
+        devices[42].toggle_power()
+        self.assertEqual(replica.sync(journal), 2, 'Delta not limited to changes')
+        self.assertEqual(replica.states[7], DeviceState(volume=5))
+        self.assertIs(replica.states[42].enabled, True)
+        self.assertEqual(replica.version, journal.version)
+
+        stale = journal.delta(0)
+        devices[7].set_volume(6)
+        replica.sync(journal)
+        self.assertEqual(replica.apply(stale), 0, 'Old changes applied again')
+        self.assertEqual(replica.states[7].volume, 6)
+
+        devices[0].set_channel(9)
+        with self.assertRaises(ValueError):
+            StateReplica().apply(journal.delta(journal.version - 1))
+
+    def test_09_track_fleet_device(self):
+        fleet = DeviceFleet()
+        fleet.add(Radio, 3)
+        journal = StateJournal()
+        radio = journal.track(fleet.device(1), 'radio')
+        version = journal.version
+
+        BridgeRemote(radio).volume_up()
+
+        self.assertEqual(fleet.volume[1], 60, 'Tracked view detached from the fleet')
+        self.assertEqual([change[1:] for change in journal.delta(version).changes],
+                         [('radio', 'volume', 60)])
+
+    def test_10_track_fleet(self):
+        fleet = DeviceFleet()
+        fleet.add(TV, 50, group='lobby')
+        fleet.add(Radio, 50)
+        journal = StateJournal()
+        replica = StateReplica()
+        journal.track_fleet(fleet)
+        self.assertEqual(replica.sync(journal), 300)
+
+        fleet.volume_up(group='lobby')
+        fleet.power_on(kind=Radio)
+        fleet.device(0).set_channel(7)
+        new = fleet.add(Radio)[0]
+
+        self.assertEqual(replica.sync(journal), 50 + 50 + 1 + 3, 'Delta not limited to changes')
+        self.assertEqual(replica.states['fleet', 0], DeviceState(volume=60, channel=7))
+        self.assertEqual(replica.states['fleet', 99], DeviceState(enabled=True))
+        self.assertEqual(replica.states['fleet', new], DeviceState())
+        self.assertEqual(len(journal), 3 * len(fleet))
+
+        fleet.power_off(kind=TV)
+        fleet.set_volume(60, group='lobby')
+        fleet.channel_up(kind=Radio)
+        fleet.set_volume(50, kind=Radio)
+        fleet.device(3).set_volume(60)
+        self.assertEqual(replica.sync(journal), 51, 'Unchanged devices were journaled')
+        self.assertEqual(replica.states['fleet', new], DeviceState(channel=2))
+
+        tv = journal.track(TV(), 0)
+        tv.set_volume(0)
+        other = journal.track_fleet(DeviceFleet(), key='other')
+        other.add(Radio, 2)
+        other.toggle_power()
+        replica.sync(journal)
+        self.assertEqual(replica.states[0], DeviceState(volume=0), 'Keys of fleet devices collide')
+        self.assertEqual(replica.states['fleet', 0], DeviceState(volume=60, channel=7))
+        self.assertEqual(replica.states['other', 1], DeviceState(enabled=True))
+        with self.assertRaises(ValueError):
+            journal.track_fleet(DeviceFleet(), key='other')
+        with self.assertRaises(ValueError):
+            StateJournal().track_fleet(fleet)
+
+
+class AsyncBridgeTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def test_00_coalesce_presses(self):
+        tv = CountingTV()
+        remote = AsyncBridgeRemote(tv, window=10)
+        for _ in range(10):
+            remote.volume_up()
+        remote.channel_down()
+        remote.channel_down()
+        for _ in range(3):
+            remote.toggle_power()
+        self.assertEqual(tv.calls, 0, 'Presses were sent before the flush')
+
+        await remote.flush()
+
+        self.assertEqual((tv.get_volume(), tv.get_channel()), (150, -1))
+        self.assertIs(tv.is_enabled(), True)
+        self.assertEqual(remote.stats.presses, 15)
+        self.assertEqual(remote.stats.flushes, 1)
+        self.assertEqual(remote.stats.device_calls, 5)
+        self.assertEqual(remote.stats.merged_calls, 22)
+
+    async def test_01_flush_window(self):
+        tv = CountingTV()
+        remote = AsyncBridgeRemote(tv, volume_increment=5, window=0.01)
+        remote.volume_up()
+        remote.volume_up()
+        remote.toggle_power()
+        remote.toggle_power()
+
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(tv.calls, 2, 'Cancelled out toggles were sent')
+        self.assertEqual(tv.get_volume(), 60, 'Presses not sent after window')
+        self.assertIs(tv.is_enabled(), False)
+
+    async def test_02_flush_on_exit(self):
+        radio = Radio()
+        async with AsyncBridgeRemote(radio, window=10) as remote:
+            remote.volume_down()
+            remote.channel_up()
+
+        self.assertEqual((radio.get_volume(), radio.get_channel()), (40, 2))
+        await remote.flush()
+        self.assertEqual(remote.stats.flushes, 1, 'Empty flush was counted')
+
+    async def test_03_flush_waits_for_send(self):
+        class SlowTV(TV):
+            def set_volume(self, volume: int) -> None:
+                time.sleep(0.1)
+                super().set_volume(volume)
+
+        tv = SlowTV()
+        async with AsyncBridgeRemote(tv, window=0.01) as remote:
+            for _ in range(3):
+                remote.volume_up()
+            await asyncio.sleep(0.05)
+
+        self.assertEqual(tv.get_volume(), 80, 'Returned before the send finished')
+
+    async def test_04_timed_flush_failure(self):
+        class BrokenTV(TV):
+            def set_volume(self, volume: int) -> None:
+                raise ConnectionError('TV unreachable')
+
+        remote = AsyncBridgeRemote(BrokenTV(), window=0.01)
+        remote.volume_up()
+        await asyncio.sleep(0.05)
+
+        with self.assertRaises(ConnectionError, msg='Timed flush failure was lost'):
+            await remote.flush()
+        self.assertEqual((remote.stats.flushes, remote.stats.failures), (0, 1))
+        await remote.flush()
+
+        remote.volume_up()
+        await asyncio.sleep(0.05)
+        with self.assertRaises(ConnectionError):
+            async with remote:
+                remote.channel_up()
+        self.assertEqual(remote.device.get_channel(), 2, 'Pending presses not sent')
+        self.assertEqual((remote.stats.flushes, remote.stats.failures), (1, 2))
+
 
 if __name__ == '__main__':
     unittest.main()
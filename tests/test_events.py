@@ -0,0 +1,75 @@
+import io
+import logging
+import unittest
+from contextlib import redirect_stdout
+
+from design_patterns.creational.factory import Factory
+from design_patterns.events import (CounterSink, LoggingSink, PrintSink,
+                                    RingBufferSink, bus)
+from design_patterns.structural.proxy import Proxy
+
+
+class EventsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.route = Factory.createDeliveryRoute('London', 'Paris')
+
+    def test_00_disabled_bus(self):
+        self.assertIs(bus.enabled, False, 'Bus enabled without sinks')
+        self.assertEqual(bus.sinks, (), 'Bus has sinks')
+
+    def test_01_ring_buffer_sink(self):
+        with bus.attached(RingBufferSink(maxlen=2)) as sink:
+            self.assertIs(bus.enabled, True, 'Bus disabled with sink')
+            for _ in range(3):
+                Factory.createTruck(self.route).deliver()
+
+        self.assertIs(bus.enabled, False, 'Bus enabled after detach')
+        self.assertEqual(len(sink), 2, 'Incorrect ring buffer size')
+        event = sink.events[-1]
+        self.assertEqual((event.source, event.name), ('Truck', 'delivered'),
+                         'Incorrect event')
+        self.assertEqual(str(event), '[Truck] delivered route=Route from Paris to London',
+                         'Incorrect event text')
+
+    def test_02_counter_sink(self):
+        with bus.attached(CounterSink()) as sink:
+            proxy = Proxy(call_limit=2)
+            for _ in range(3):
+                proxy.get_user('bob')
+
+        self.assertEqual(sink['PaymentAPI', 'user_call'], 3, 'Incorrect event count')
+        self.assertEqual(sink['Proxy', 'request'], 1, 'Incorrect event count')
+        self.assertEqual(sink['Proxy', 'limit_reached'], 2, 'Incorrect event count')
+
+    def test_03_logging_sink(self):
+        logger = logging.getLogger('design_patterns.test')
+        with self.assertLogs(logger, level='INFO') as logs:
+            with bus.attached(LoggingSink(logger)):
+                Factory.createShip(self.route).deliver()
+
+        self.assertEqual(len(logs.output), 1, 'Incorrect log count')
+        self.assertIn('[Ship] delivered', logs.output[0], 'Incorrect log message')
+
+    def test_04_multiple_sinks(self):
+        counter, ring = CounterSink(), RingBufferSink()
+        bus.attach(counter)
+        bus.attach(ring)
+        bus.detach(counter)
+        Factory.createTrain(self.route).deliver()
+        bus.detach(ring)
+
+        self.assertEqual(counter['Train', 'delivered'], 0, 'Detached sink got event')
+        self.assertEqual(len(ring), 1, 'Attached sink missed event')
+
+    def test_05_print_sink(self):
+        out = io.StringIO()
+        with redirect_stdout(out), bus.attached(PrintSink()):
+            Factory.createTrain(self.route).deliver()
+
+        self.assertEqual(out.getvalue(),
+                         '[Train] delivered route=Route from Paris to London\n')
+
+
+if __name__ == '__main__':
+    unittest.main()